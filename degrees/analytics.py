@@ -0,0 +1,176 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+
+import degrees
+
+# Co-star adjacency by person index, inherited by workers on fork
+adjacency = []
+
+
+class UnionFind():
+    """
+    Disjoint sets over the integers 0 to n - 1, with path halving
+    and union by size.
+    """
+
+    def __init__(self, n):
+        self.parent = array("l", range(n))
+        self.size = array("l", [1]) * n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+
+def build_adjacency():
+    """
+    Return (person_ids, adjacency), where adjacency[i] is an array
+    of the indices of person i's co-stars.
+    """
+    if degrees.costars is None:
+        degrees.precompute_neighbors()
+    person_ids = list(degrees.people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+    graph = [
+        array("l", (index[star] for _, star in degrees.costars[person_id]))
+        for person_id in person_ids
+    ]
+    return person_ids, graph
+
+
+def components(person_ids):
+    """
+    Return the sizes of the connected components of the co-star graph,
+    largest first, joining everyone who starred in the same movie.
+    """
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+    sets = UnionFind(len(person_ids))
+    for movie in degrees.movies.values():
+        stars = [index[star] for star in movie["stars"] if star in index]
+        for star in stars[1:]:
+            sets.union(stars[0], star)
+
+    sizes = Counter(sets.find(i) for i in range(len(person_ids)))
+    return sorted(sizes.values(), reverse=True)
+
+
+def distances_from(source):
+    """
+    Breadth-first search the co-star graph from person index `source`.
+    Return (eccentricity, Counter of people at each distance > 0).
+    """
+    depth = array("l", [-1]) * len(adjacency)
+    depth[source] = 0
+    histogram = Counter()
+    frontier = [source]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for i in frontier:
+            for j in adjacency[i]:
+                if depth[j] == -1:
+                    depth[j] = distance
+                    next_frontier.append(j)
+        if next_frontier:
+            histogram[distance] = len(next_frontier)
+        frontier = next_frontier
+    return max(histogram, default=0), histogram
+
+
+def sample_distances(sources, workers=1):
+    """
+    Run distances_from for every index in `sources`, spread over
+    a forked process pool when `workers` is more than one.
+    Return a list of (eccentricity, histogram) results.
+    """
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            return pool.map(distances_from, sources, chunksize=1)
+    return [distances_from(source) for source in sources]
+
+
+def main():
+    global adjacency
+    parser = argparse.ArgumentParser(
+        usage="python analytics.py [options] [directory]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--samples", type=int, default=100,
+                        help="number of people to measure separation from")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes running the searches")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(sys.argv[1:])
+
+    start = time.perf_counter()
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    person_ids, adjacency = build_adjacency()
+    print(f"Data loaded in {time.perf_counter() - start:.1f}s.")
+
+    # Degree distribution
+    degree_counts = Counter(len(neighbors) for neighbors in adjacency)
+    edges = sum(degree * count for degree, count in degree_counts.items()) // 2
+    print(f"{len(person_ids)} people, {len(degrees.movies)} movies, "
+          f"{edges} co-star pairs")
+    print("Degree distribution (co-stars: people):")
+    for degree in sorted(degree_counts)[:20]:
+        print(f"  {degree}: {degree_counts[degree]}")
+    if len(degree_counts) > 20:
+        print(f"  ... up to {max(degree_counts)}")
+
+    # Connected components
+    sizes = components(person_ids)
+    print(f"{len(sizes)} connected components; largest: "
+          f"{', '.join(str(size) for size in sizes[:5])}")
+    print(f"  {sizes.count(1)} people with no co-stars")
+
+    # Separation sampled from random sources
+    rng = random.Random(args.seed)
+    connected = [i for i, neighbors in enumerate(adjacency) if neighbors]
+    sources = rng.sample(connected, min(args.samples, len(connected)))
+    start = time.perf_counter()
+    results = sample_distances(sources, args.workers)
+    elapsed = time.perf_counter() - start
+
+    total = Counter()
+    for _, histogram in results:
+        total.update(histogram)
+    reached = sum(total.values())
+    eccentricities = [eccentricity for eccentricity, _ in results]
+    print(f"Separation from {len(sources)} sampled people "
+          f"({elapsed:.1f}s):")
+    if reached:
+        average = sum(d * count for d, count in total.items()) / reached
+        print(f"  average separation: {average:.3f}")
+        for distance in sorted(total):
+            print(f"  {distance} degrees: {total[distance] / reached:.2%}")
+    if eccentricities:
+        print(f"  eccentricity: min {min(eccentricities)}, "
+              f"mean {sum(eccentricities) / len(eccentricities):.2f}, "
+              f"max {max(eccentricities)} (diameter is at least this)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from compact import load_compact
+from util import Node, StackFrontier, QueueFrontier
+
+
+def bench_frontier(frontier_class, n):
+    """
+    Time adding `n` nodes to a frontier, checking membership for each
+    of them, and removing them all again.
+    Return throughput in operations per second.
+    """
+    frontier = frontier_class()
+    nodes = [Node(state=i, parent=None, action=None) for i in range(n)]
+
+    start = time.perf_counter()
+    for node in nodes:
+        frontier.add(node)
+    for i in range(n):
+        frontier.contains_state(i)
+    while not frontier.empty():
+        frontier.remove()
+    elapsed = time.perf_counter() - start
+
+    return 3 * n / elapsed
+
+
+def bench_load(loader, directory):
+    """
+    Load `directory` with `loader`, once for timing and once
+    under tracemalloc. Return (seconds, bytes allocated).
+    """
+    start = time.perf_counter()
+    result = loader(directory)
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = loader(directory)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return elapsed, size
+
+
+def load_dicts(directory):
+    """
+    Load `directory` into fresh copies of the dicts in degrees.
+    """
+    degrees.names, degrees.people, degrees.movies = {}, {}, {}
+    degrees.load_data(directory)
+    return degrees.names, degrees.people, degrees.movies
+
+
+def bench_neighbors(directory, queries=100, seed=0):
+    """
+    Time shortest_path over random pairs of people with neighbours
+    computed on the fly and precomputed.
+    Return a dict of seconds per mode, plus the precomputation time.
+    """
+    load_dicts(directory)
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    pairs = [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(queries)
+    ]
+
+    results = {}
+    degrees.costars = None
+    start = time.perf_counter()
+    for source, target in pairs:
+        degrees.shortest_path(source, target)
+    results["on the fly"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    degrees.precompute_neighbors()
+    results["precompute"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for source, target in pairs:
+        degrees.shortest_path(source, target)
+    results["precomputed"] = time.perf_counter() - start
+    degrees.costars = None
+
+    return results
+
+
+def main():
+    commands = ("frontier", "load", "neighbors")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        sys.exit("Usage: python benchmark.py frontier [sizes...] | "
+                 "load [directory] | neighbors [directory] [queries]")
+
+    if sys.argv[1] == "frontier":
+        sizes = [int(arg) for arg in sys.argv[2:]] or [10 ** 5, 10 ** 6]
+        print("Frontier throughput")
+        for n in sizes:
+            for frontier_class in (StackFrontier, QueueFrontier):
+                ops = bench_frontier(frontier_class, n)
+                print(f"  {frontier_class.__name__} n={n}: {ops:,.0f} ops/s")
+
+    elif sys.argv[1] == "load":
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        print(f"Load time and memory for {directory}")
+        for label, loader in (("dicts", load_dicts), ("compact", load_compact)):
+            elapsed, size = bench_load(loader, directory)
+            print(f"  {label}: {elapsed:.3f}s, {size / 2 ** 20:.2f} MiB")
+
+    elif sys.argv[1] == "neighbors":
+        directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+        queries = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        print(f"shortest_path over {queries} random pairs in {directory}")
+        for label, elapsed in bench_neighbors(directory, queries).items():
+            print(f"  {label}: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
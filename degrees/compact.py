@@ -0,0 +1,269 @@
+import csv
+from array import array
+from collections.abc import Mapping
+
+
+class CompactGraph():
+    """
+    Person-movie graph with people and movies interned to dense integers.
+
+    Each side of the bipartite graph is stored in CSR form: the movies of
+    person `i` are `person_movies[person_offsets[i]:person_offsets[i + 1]]`,
+    and the stars of movie `j` are
+    `movie_stars[movie_offsets[j]:movie_offsets[j + 1]]`.
+    """
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # Maps IMDB person ids to dense indices
+        self.person_index = {}
+        # Maps lowercase names to a person index, or a tuple of them
+        self.name_index = {}
+
+        self.person_offsets = array("l", [0])
+        self.person_movies = array("l")
+        self.movie_offsets = array("l", [0])
+        self.movie_stars = array("l")
+
+        # Number of states explored by the most recent search
+        self.num_explored = 0
+
+    def movies_of(self, i):
+        """
+        Returns the movie indices person `i` starred in.
+        """
+        return self.person_movies[self.person_offsets[i]:self.person_offsets[i + 1]]
+
+    def stars_of(self, j):
+        """
+        Returns the person indices who starred in movie `j`.
+        """
+        return self.movie_stars[self.movie_offsets[j]:self.movie_offsets[j + 1]]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for j in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[j]
+            for i in self.stars_of(j):
+                neighbors.add((movie_id, self.person_ids[i]))
+        return neighbors
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        self.num_explored = 0
+        if source == target:
+            return []
+
+        # Parent person and connecting movie of every reached person
+        parent = array("l", [-1]) * len(self.person_ids)
+        action = array("l", [-1]) * len(self.person_ids)
+        parent[source] = source
+        # Each movie's cast only needs to be scanned once
+        seen_movie = bytearray(len(self.movie_ids))
+
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for i in frontier:
+                self.num_explored += 1
+                for j in self.movies_of(i):
+                    if seen_movie[j]:
+                        continue
+                    seen_movie[j] = 1
+                    for k in self.stars_of(j):
+                        if parent[k] != -1:
+                            continue
+                        parent[k] = i
+                        action[k] = j
+                        if k == target:
+                            return self._path(parent, action, source, target)
+                        next_frontier.append(k)
+            frontier = next_frontier
+
+        return None
+
+    def _path(self, parent, action, source, target):
+        solution = []
+        i = target
+        while i != source:
+            solution.append((self.movie_ids[action[i]], self.person_ids[i]))
+            i = parent[i]
+        solution.reverse()
+        return solution
+
+
+def load_compact(directory):
+    """
+    Load data from CSV files into a CompactGraph.
+    """
+    graph = CompactGraph()
+
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            i = len(graph.person_ids)
+            graph.person_index[row["id"]] = i
+            graph.person_ids.append(row["id"])
+            graph.person_names.append(row["name"])
+            graph.person_births.append(row["birth"])
+            name = row["name"].lower()
+            if name not in graph.name_index:
+                graph.name_index[name] = i
+            elif isinstance(graph.name_index[name], tuple):
+                graph.name_index[name] += (i,)
+            else:
+                graph.name_index[name] = (graph.name_index[name], i)
+
+    # Load movies, keeping the id lookup only for the duration of the load
+    movie_index = {}
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_index[row["id"]] = len(graph.movie_ids)
+            graph.movie_ids.append(row["id"])
+            graph.movie_titles.append(row["title"])
+            graph.movie_years.append(row["year"])
+
+    # Load stars as a flat edge list
+    edge_people = array("l")
+    edge_movies = array("l")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            i = graph.person_index.get(row["person_id"])
+            j = movie_index.get(row["movie_id"])
+            if i is None or j is None:
+                continue
+            edge_people.append(i)
+            edge_movies.append(j)
+
+    graph.person_offsets, graph.person_movies = _csr(
+        edge_people, edge_movies, len(graph.person_ids)
+    )
+    graph.movie_offsets, graph.movie_stars = _csr(
+        edge_movies, edge_people, len(graph.movie_ids)
+    )
+    return graph
+
+
+def _csr(rows, columns, n):
+    """
+    Group `columns` by `rows` with a counting sort.
+    Return (offsets, values) arrays, with duplicate edges removed.
+    """
+    offsets = array("l", [0]) * (n + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    values = array("l", [0]) * len(rows)
+    position = array("l", offsets[:-1])
+    for row, column in zip(rows, columns):
+        values[position[row]] = column
+        position[row] += 1
+
+    # Drop repeated rows of stars.csv, which the dict loader merges in sets
+    deduplicated = array("l")
+    compact_offsets = array("l", [0]) * (n + 1)
+    for i in range(n):
+        segment = values[offsets[i]:offsets[i + 1]]
+        if len(segment) > 1:
+            segment = array("l", sorted(set(segment)))
+        deduplicated.extend(segment)
+        compact_offsets[i + 1] = len(deduplicated)
+    return compact_offsets, deduplicated
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like `degrees.people`.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        i = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[i],
+            "birth": graph.person_births[i],
+            "movies": {graph.movie_ids[j] for j in graph.movies_of(i)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like `degrees.movies`.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        # Built on first lookup, since only printing needs it
+        self.movie_index = None
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        if self.movie_index is None:
+            self.movie_index = {
+                movie_id: j for j, movie_id in enumerate(graph.movie_ids)
+            }
+        j = self.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[j],
+            "year": graph.movie_years[j],
+            "stars": {graph.person_ids[i] for i in graph.stars_of(j)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like `degrees.names`.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        indices = graph.name_index[name]
+        if not isinstance(indices, tuple):
+            indices = (indices,)
+        return {graph.person_ids[i] for i in indices}
+
+    def __iter__(self):
+        return iter(self.graph.name_index)
+
+    def __len__(self):
+        return len(self.graph.name_index)
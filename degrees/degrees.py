@@ -1,7 +1,19 @@
+import argparse
 import csv
+import itertools
+import multiprocessing
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from compact import load_compact, NamesView, PeopleView, MoviesView
+from nameindex import NameIndex
+from snapshot import load_snapshot, save_snapshot, snapshot_key
+from util import LRUCache, Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -10,11 +22,45 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Number of states explored by the most recent search
+num_explored = 0
+
+# Search and name resolution used by batch workers,
+# inherited from the parent process on fork
+batch_options = {"search": None, "policy": "ask", "fuzzy": False}
+
+# Prefix and fuzzy index over `names`, built on first use
+name_index = None
+
+# Breadth-first search trees of recent sources, when caching is enabled
+tree_cache = None
+
+# Maps person_ids to a tuple of (movie_id, person_id) pairs, one per co-star,
+# when neighbours have been precomputed
+costars = None
+
+# The CompactGraph loaded by load_compact_data, whose arrays neighbour
+# lookups read directly rather than through the dict-shaped views
+compact_graph = None
+
 
-def load_data(directory):
+def load_data(directory, snapshot=False):
     """
     Load data from CSV files into memory.
+
+    If `snapshot` is true, reuse the binary snapshot saved by an earlier
+    load when the CSV files have not changed, and save one otherwise.
     """
+    global names, people, movies
+
+    if snapshot:
+        # Taken before reading, so changes made during the load invalidate it
+        key = snapshot_key(directory)
+        saved = load_snapshot(directory, key)
+        if saved is not None:
+            names, people, movies = saved
+            return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -49,37 +95,426 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    if snapshot:
+        save_snapshot(directory, (names, people, movies), key)
+
+
+def stream_data(directory, min_year=None, max_year=None, min_cast=0,
+                chunk_size=10000):
+    """
+    Load data from CSV files into memory, reading each file in chunks of
+    `chunk_size` rows and keeping only movies released between
+    `min_year` and `max_year` with at least `min_cast` stars.
+    When filtering, people left without any movie are dropped too.
+
+    Return a report of rows read, skipped, orphaned and filtered out
+    per file, and the peak resident memory in bytes (if known).
+    """
+    filtering = min_year is not None or max_year is not None or min_cast > 0
+    report = {
+        "people": {"read": 0, "skipped": 0, "filtered": 0},
+        "movies": {"read": 0, "skipped": 0, "filtered": 0},
+        "stars": {"read": 0, "skipped": 0, "filtered": 0, "orphaned": 0}
+    }
+
+    # Load movies released in the requested years, remembering the ids
+    # filtered out so their stars rows are not mistaken for orphans
+    counts = report["movies"]
+    dropped = set()
+    for chunk in read_chunks(f"{directory}/movies.csv", chunk_size):
+        for row in chunk:
+            counts["read"] += 1
+            if len(row) != 3 or not row[0] or row[0] in movies:
+                counts["skipped"] += 1
+                continue
+            movie_id, title, year = row
+            if min_year is not None or max_year is not None:
+                try:
+                    released = int(year)
+                except ValueError:
+                    released = None
+                if (released is None or
+                        (min_year is not None and released < min_year) or
+                        (max_year is not None and released > max_year)):
+                    counts["filtered"] += 1
+                    dropped.add(movie_id)
+                    continue
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+
+    # Count stars rows per movie in a first pass, so most small casts are
+    # never stored. Rows can repeat or name unknown people, so this only
+    # bounds the cast from above; the exact cut is made once people are in.
+    if min_cast > 0:
+        cast_sizes = dict.fromkeys(movies, 0)
+        for chunk in read_chunks(f"{directory}/stars.csv", chunk_size):
+            for row in chunk:
+                if len(row) == 2 and row[1] in cast_sizes:
+                    cast_sizes[row[1]] += 1
+        for movie_id, size in cast_sizes.items():
+            if size < min_cast:
+                del movies[movie_id]
+                dropped.add(movie_id)
+                counts["filtered"] += 1
+        del cast_sizes
+
+    # Load stars of the kept movies, holding credits until people are known
+    counts = report["stars"]
+    credits = {}
+    for chunk in read_chunks(f"{directory}/stars.csv", chunk_size):
+        for row in chunk:
+            counts["read"] += 1
+            if len(row) != 2 or not row[0] or not row[1]:
+                counts["skipped"] += 1
+                continue
+            person_id, movie_id = row
+            if movie_id not in movies:
+                counts["filtered" if movie_id in dropped else "orphaned"] += 1
+                continue
+            movies[movie_id]["stars"].add(person_id)
+            credits.setdefault(person_id, set()).add(movie_id)
+    del dropped
+
+    # Load people, attaching the credits gathered above
+    counts = report["people"]
+    for chunk in read_chunks(f"{directory}/people.csv", chunk_size):
+        for row in chunk:
+            counts["read"] += 1
+            if len(row) != 3 or not row[0] or row[0] in people:
+                counts["skipped"] += 1
+                continue
+            person_id, name, birth = row
+            movie_ids = credits.pop(person_id, set())
+            people[person_id] = {"name": name, "birth": birth, "movies": movie_ids}
+
+    # Whatever credits remain name people missing from people.csv
+    for person_id, movie_ids in credits.items():
+        report["stars"]["orphaned"] += len(movie_ids)
+        for movie_id in movie_ids:
+            movies[movie_id]["stars"].discard(person_id)
+    del credits
+
+    # Now that casts hold only distinct, known people, drop small ones
+    if min_cast > 0:
+        for movie_id in [movie_id for movie_id, movie in movies.items()
+                         if len(movie["stars"]) < min_cast]:
+            for person_id in movies.pop(movie_id)["stars"]:
+                people[person_id]["movies"].discard(movie_id)
+                report["stars"]["filtered"] += 1
+            report["movies"]["filtered"] += 1
+
+    # When filtering, drop people left without any movie
+    for person_id in list(people):
+        if filtering and not people[person_id]["movies"]:
+            del people[person_id]
+            report["people"]["filtered"] += 1
+        else:
+            name = people[person_id]["name"].lower()
+            names.setdefault(name, set()).add(person_id)
+
+    report["peak_rss"] = peak_rss()
+    return report
+
+
+def read_chunks(path, chunk_size):
+    """
+    Yield lists of up to `chunk_size` rows from the CSV file at `path`,
+    skipping its header.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def peak_rss():
+    """
+    Return the peak resident memory of this process in bytes,
+    or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def load_compact_data(directory):
+    """
+    Load data from CSV files into a CompactGraph, and point
+    `names`, `people` and `movies` at read-only views of it.
+    """
+    global names, people, movies, compact_graph
+    graph = load_compact(directory)
+    compact_graph = graph
+    names = NamesView(graph)
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
+    return graph
+
+
+def precompute_neighbors():
+    """
+    Build `costars`, after which neighbors_for_person answers from it
+    instead of scanning every movie's stars on each call.
+    Each co-star appears once, with one movie they share, and nobody
+    is listed as their own neighbour.
+    """
+    global costars
+    costars = None
+
+    if compact_graph is not None:
+        costars = compact_costars(compact_graph)
+        return
+
+    adjacency = {}
+    for person_id in people:
+        adjacent = {}
+        for movie_id in people[person_id]["movies"]:
+            for star in movies[movie_id]["stars"]:
+                if star not in adjacent:
+                    adjacent[star] = movie_id
+        adjacent.pop(person_id, None)
+        adjacency[person_id] = tuple(
+            (movie_id, star) for star, movie_id in adjacent.items()
+        )
+    costars = adjacency
+
+
+def compact_costars(graph):
+    """
+    Return `costars` for a CompactGraph, built from its arrays.
+    """
+    person_ids = graph.person_ids
+    movie_ids = graph.movie_ids
+    adjacency = {}
+    for i, person_id in enumerate(person_ids):
+        adjacent = {}
+        for j in graph.movies_of(i):
+            for star in graph.stars_of(j):
+                if star not in adjacent:
+                    adjacent[star] = j
+        adjacent.pop(i, None)
+        adjacency[person_id] = tuple(
+            (movie_ids[j], person_ids[star]) for star, j in adjacent.items()
+        )
+    return adjacency
+
+
+def parse_args(argv):
+    """
+    Parse command-line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [options] [directory]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends at once")
+    parser.add_argument("--stats", action="store_true",
+                        help="report the number of states explored")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph as integer-indexed arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="cache the parsed CSV files in a binary snapshot")
+    parser.add_argument("--stream", action="store_true",
+                        help="load the CSV files in chunks and report on them")
+    parser.add_argument("--min-year", type=int,
+                        help="only load movies released in or after this year")
+    parser.add_argument("--max-year", type=int,
+                        help="only load movies released in or before this year")
+    parser.add_argument("--min-cast", type=int, default=0,
+                        help="only load movies with at least this many stars")
+    parser.add_argument("--precompute", action="store_true",
+                        help="build a co-star adjacency index after loading")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="match unknown names by spelling or prefix, "
+                             "disambiguating several matches like a shared "
+                             "name")
+    parser.add_argument("--disambiguate", choices=["ask", "most-credited"],
+                        default="ask",
+                        help="how to choose between people sharing a name")
+    parser.add_argument("--paths", type=int, default=1, metavar="K",
+                        help="show up to K different shortest paths")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer one 'name,name' query per line of FILE "
+                             "('-' for stdin) instead of prompting")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes answering batch queries")
+    parser.add_argument("--cache-size", type=int, default=0, metavar="N",
+                        help="cache search trees of recent sources, "
+                             "holding up to N people in total")
+    return parser.parse_args(argv)
+
+
+def print_report(report, file):
+    """
+    Print the report returned by stream_data.
+    """
+    for filename in ("people", "movies", "stars"):
+        counts = ", ".join(
+            f"{count} {label}" for label, count in report[filename].items()
+        )
+        print(f"{filename}.csv: {counts}", file=file)
+    if report["peak_rss"] is not None:
+        print(f"Peak memory: {report['peak_rss'] / 2 ** 20:.1f} MiB", file=file)
+
+
+def choose_search(args, graph):
+    """
+    Return the search function selected by the command-line arguments.
+    """
+    global tree_cache
+    if args.cache_size > 0:
+        tree_cache = LRUCache(args.cache_size)
+        return cached_shortest_path
+    if args.bidirectional:
+        return bidirectional_shortest_path
+    if graph is not None:
+        return graph.shortest_path
+    return shortest_path
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    global num_explored
+    args = parse_args(sys.argv[1:])
+    directory = args.directory
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    # Keep stdout for answers when running a batch
+    log = sys.stderr if args.batch else sys.stdout
 
-    source = person_id_for_name(input("Name: "))
+    # Load data from files into memory
+    print("Loading data...", file=log)
+    graph = None
+    if args.compact:
+        graph = load_compact_data(directory)
+    elif (args.stream or args.min_year is not None or
+          args.max_year is not None or args.min_cast > 0):
+        report = stream_data(directory, args.min_year, args.max_year,
+                             args.min_cast)
+        print_report(report, log)
+    else:
+        load_data(directory, snapshot=args.snapshot)
+    if args.precompute:
+        precompute_neighbors()
+    print("Data loaded.", file=log)
+
+    search = choose_search(args, graph)
+
+    if args.batch:
+        options = dict(policy=args.disambiguate, fuzzy=args.fuzzy)
+        if args.batch == "-":
+            run_batch(sys.stdin, search, args.workers, **options)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, search, args.workers, **options)
+        return
+
+    source = person_id_for_name(input("Name: "), args.disambiguate, args.fuzzy)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), args.disambiguate, args.fuzzy)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.paths > 1:
+        paths = list(itertools.islice(
+            all_shortest_paths(source, target), args.paths
+        ))
+        path = paths[0] if paths else None
+    else:
+        path = search(source, target)
+        paths = [path]
+        if graph is not None and search == graph.shortest_path:
+            num_explored = graph.num_explored
+
+    if args.stats:
+        print(f"{num_explored} states explored.")
 
     if path is None:
         print("Not connected.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        for n, path in enumerate(paths):
+            if len(paths) > 1:
+                print(f"Path {n + 1}:")
+            path = [(None, source)] + path
+            for i in range(degrees):
+                person1 = people[path[i][1]]["name"]
+                person2 = people[path[i + 1][1]]["name"]
+                movie = movies[path[i + 1][0]]["title"]
+                print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def run_batch(lines, search, workers=1, out=None, policy="ask", fuzzy=False):
+    """
+    Answer a degrees query for every line of `lines`, each holding two
+    comma-separated names, writing `source,target,result` rows to `out`.
+    The result is the number of degrees, or "not connected",
+    "not found" or "ambiguous".
+
+    Names are resolved as by person_id_for_name, except that the "ask"
+    policy reports shared names as ambiguous instead of prompting.
+
+    With several `workers`, queries are fanned out over a process pool
+    forked after loading, so the graph is shared copy-on-write.
+    Throughput is reported on stderr when done.
+    """
+    batch_options.update(search=search, policy=policy, fuzzy=fuzzy)
+    if fuzzy:
+        get_name_index()
+
+    queries = [row for row in csv.reader(lines) if row]
+    writer = csv.writer(out or sys.stdout)
+    start = time.perf_counter()
+
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            chunksize = max(1, len(queries) // (workers * 4))
+            for row in pool.imap(answer_query, queries, chunksize):
+                writer.writerow(row)
+    else:
+        for query in queries:
+            writer.writerow(answer_query(query))
+
+    elapsed = time.perf_counter() - start
+    rate = len(queries) / elapsed if elapsed else float("inf")
+    print(f"Answered {len(queries)} queries in {elapsed:.3f}s "
+          f"({rate:.1f} queries/second).", file=sys.stderr)
+    if tree_cache is not None and workers <= 1:
+        print(f"Search tree cache: {tree_cache.hits} hits, "
+              f"{tree_cache.misses} misses.", file=sys.stderr)
+
+
+def answer_query(query):
+    """
+    Return the output row for a single batch query.
+    """
+    if len(query) != 2:
+        return query + ["invalid"]
+    source_name, target_name = (name.strip() for name in query)
+
+    person_ids = []
+    for name in (source_name, target_name):
+        matches = person_ids_for_name(name, batch_options["fuzzy"])
+        if len(matches) == 0:
+            return [source_name, target_name, "not found"]
+        if len(matches) == 1:
+            person_ids.append(matches[0])
+        elif batch_options["policy"] == "most-credited":
+            person_ids.append(most_credited(matches))
+        else:
+            return [source_name, target_name, "ambiguous"]
+
+    path = batch_options["search"](*person_ids)
+    if path is None:
+        return [source_name, target_name, "not connected"]
+    return [source_name, target_name, len(path)]
 
 
 def shortest_path(source, target):
@@ -89,9 +524,8 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    global num_explored
 
-    # TODO
-    
     # Keep track of number of states explored
     num_explored = 0
 
@@ -108,7 +542,7 @@ def shortest_path(source, target):
 
         # If nothing left in frontier, then no path
         if frontier.empty():
-            raise Exception("None")
+            return None
 
         # Choose a node from the frontier
         node = frontier.remove()
@@ -130,7 +564,6 @@ def shortest_path(source, target):
             for i in range(len(movies)):
                 solution.append((movies[i], names[i]))
 
-            # print("number of states explored: ", num_explored)
             return solution
 
         # Mark node as explored
@@ -158,21 +591,256 @@ def shortest_path(source, target):
                     for i in range(len(movies)):
                         solution.append((movies[i], names[i]))
 
-                    # solution = (movies, names)
-                    # print("number of states explored: ", num_explored)
                     return solution
                 
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends and always expanding the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+    num_explored = 0
+
+    if source == target:
+        return []
+
+    # Map each reached person to (movie_id, neighbouring person_id, depth),
+    # pointing back towards the side's starting person
+    forward = {source: (None, None, 0)}
+    backward = {target: (None, None, 0)}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Expand whichever side has fewer people waiting
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, reached, other = forward_frontier, forward, backward
+            from_source = True
+        else:
+            frontier, reached, other = backward_frontier, backward, forward
+            from_source = False
+
+        # Expand a whole level, keeping the shortest meeting point found
+        meeting = None
+        next_frontier = []
+        for person_id in frontier:
+            num_explored += 1
+            depth = reached[person_id][2]
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in other:
+                    length = depth + 1 + other[neighbor][2]
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, person_id, movie_id, neighbor)
+                if neighbor not in reached:
+                    reached[neighbor] = (movie_id, person_id, depth + 1)
+                    next_frontier.append(neighbor)
+
+        if meeting is not None:
+            _, person_id, movie_id, neighbor = meeting
+            if from_source:
+                return _splice(forward, backward, person_id, movie_id, neighbor)
+            return _splice(forward, backward, neighbor, movie_id, person_id)
+
+        if from_source:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+
+    A single breadth-first pass records, for each person, every
+    (movie_id, person_id) step from the previous layer; paths are then
+    walked back from the target lazily, so taking the first few
+    costs little beyond the search itself.
+    Yields nothing if no possible path.
+    """
+    global num_explored
+    num_explored = 0
+
+    depth = {source: 0}
+    steps = {source: []}
+    layer = [source]
+    while layer and target not in depth:
+        next_layer = []
+        for person_id in layer:
+            num_explored += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in depth:
+                    depth[neighbor] = depth[person_id] + 1
+                    steps[neighbor] = [(movie_id, person_id)]
+                    next_layer.append(neighbor)
+                elif depth[neighbor] == depth[person_id] + 1:
+                    steps[neighbor].append((movie_id, person_id))
+        layer = next_layer
+
+    if target not in depth:
+        return
+
+    def walk(person_id):
+        if person_id == source:
+            yield []
+            return
+        for movie_id, previous in steps[person_id]:
+            for path in walk(previous):
+                yield path + [(movie_id, person_id)]
+
+    yield from walk(target)
+
+
+def search_tree(source):
+    """
+    Returns a dict mapping every person reachable from the source
+    to the (movie_id, person_id) step leading back towards it.
+    """
+    global num_explored
+    num_explored = 0
+
+    tree = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in tree:
+                    tree[neighbor] = (movie_id, person_id)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return tree
+
+
+def cached_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, by walking a cached search
+    tree of either person. On a miss the source's tree is computed and
+    cached in `tree_cache`.
+
+    If no possible path, returns None.
+    """
+    global num_explored
+
+    # A tree rooted at the target leads from the source in path order
+    tree = tree_cache.get(target) if target in tree_cache else None
+    if tree is not None:
+        num_explored = 0
+        if source not in tree:
+            return None
+        solution = []
+        person_id = source
+        while tree[person_id] is not None:
+            movie_id, person_id = tree[person_id]
+            solution.append((movie_id, person_id))
+        return solution
+
+    tree = tree_cache.get(source)
+    if tree is None:
+        tree = search_tree(source)
+        tree_cache.put(source, tree)
+    else:
+        num_explored = 0
+
+    if target not in tree:
+        return None
+    solution = []
+    person_id = target
+    while tree[person_id] is not None:
+        movie_id, parent = tree[person_id]
+        solution.append((movie_id, person_id))
+        person_id = parent
+    solution.reverse()
+    return solution
+
+
+def _splice(forward, backward, left, movie_id, right):
+    """
+    Joins the forward search tree ending at `left` and the backward
+    search tree starting at `right`, which co-starred in `movie_id`.
+    """
+    solution = []
+
+    # Walk back from the meeting point to the source
+    person_id = left
+    while forward[person_id][1] is not None:
+        action, parent, _ = forward[person_id]
+        solution.append((action, person_id))
+        person_id = parent
+    solution.reverse()
+
+    solution.append((movie_id, right))
+
+    # Walk forward from the meeting point to the target
+    person_id = right
+    while backward[person_id][1] is not None:
+        action, child, _ = backward[person_id]
+        solution.append((action, child))
+        person_id = child
+
+    return solution
+
+
+def get_name_index():
+    """
+    Returns the NameIndex over `names`, building it on first use.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
+def person_ids_for_name(name, fuzzy=False):
+    """
+    Returns a list of IMDB ids for a person's name. With `fuzzy`,
+    a name with no exact match falls back to the candidates from the
+    name index: if several names match, the ids of all of them are
+    returned, best match first, to be disambiguated like a shared name.
+    """
+    person_ids = names.get(name.lower(), set())
+    if person_ids or not fuzzy:
+        return list(person_ids)
+    return [
+        person_id
+        for _, matches in get_name_index().candidates(name)
+        for person_id in sorted(matches)
+    ]
+
+
+def most_credited(person_ids):
+    """
+    Returns whichever of `person_ids` starred in the most movies.
+    """
+    return max(person_ids, key=lambda person_id: (
+        len(people[person_id]["movies"]), person_id
+    ))
+
+
+def person_id_for_name(name, policy="ask", fuzzy=False):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    The "ask" policy prompts for the intended person, while
+    "most-credited" picks the person with the most movies.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name, fuzzy)
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and policy == "most-credited":
+        return most_credited(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -196,6 +864,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if costars is not None:
+        return costars[person_id]
+    if compact_graph is not None:
+        return compact_graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
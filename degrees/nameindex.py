@@ -0,0 +1,174 @@
+from array import array
+from bisect import bisect_left
+
+# Length of the character n-grams used to find fuzzy candidates
+GRAM = 3
+
+
+class NameIndex():
+    """
+    Index over lowercase names supporting exact, prefix and
+    edit-distance lookups.
+
+    Names are kept in one sorted list, so a prefix is a contiguous range
+    found by bisection. Fuzzy lookups gather candidates from an inverted
+    index of character trigrams and verify them with a bounded
+    Levenshtein distance.
+    """
+
+    def __init__(self, names):
+        """
+        Build the index from a mapping of lowercase names to values,
+        such as `degrees.names`.
+        """
+        self.keys = sorted(names)
+        self.values = [names[key] for key in self.keys]
+
+        # Maps each trigram to the sorted indices of keys containing it
+        self.grams = {}
+        # Maps each key length to the indices of keys that long
+        self.lengths = {}
+        for i, key in enumerate(self.keys):
+            for gram in grams(key):
+                if gram not in self.grams:
+                    self.grams[gram] = array("i")
+                self.grams[gram].append(i)
+            if len(key) not in self.lengths:
+                self.lengths[len(key)] = array("i")
+            self.lengths[len(key)].append(i)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def exact(self, name):
+        """
+        Return the value for `name`, or None if it is not indexed.
+        """
+        name = name.lower()
+        i = bisect_left(self.keys, name)
+        if i < len(self.keys) and self.keys[i] == name:
+            return self.values[i]
+        return None
+
+    def prefix(self, prefix, limit=10):
+        """
+        Return up to `limit` (name, value) pairs whose name starts
+        with `prefix`, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while (i < len(self.keys) and len(matches) < limit
+               and self.keys[i].startswith(prefix)):
+            matches.append((self.keys[i], self.values[i]))
+            i += 1
+        return matches
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Return up to `limit` (distance, name, value) triples for names
+        within `max_distance` edits of `name`, closest first.
+        """
+        name = name.lower()
+        query = grams(name)
+
+        # Any name within k edits shares at least one of any 3k + 1
+        # distinct trigrams of the query, so only the rarest are scanned
+        needed = GRAM * max_distance + 1
+        if len(query) >= needed:
+            rarest = sorted(query, key=lambda g: len(self.grams.get(g, ())))
+            candidates = set()
+            for gram in rarest[:needed]:
+                candidates.update(self.grams.get(gram, ()))
+        else:
+            candidates = set()
+            for length in range(len(name) - max_distance,
+                                len(name) + max_distance + 1):
+                candidates.update(self.lengths.get(length, ()))
+
+        # Each edit removes at most 3 of the query's distinct trigrams
+        shared = len(query) - GRAM * max_distance
+
+        matches = []
+        for i in candidates:
+            key = self.keys[i]
+            if abs(len(key) - len(name)) > max_distance:
+                continue
+            if shared > 0 and len(query & grams(key)) < shared:
+                continue
+            distance = edit_distance(name, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, key, self.values[i]))
+        matches.sort(key=lambda match: (match[0], match[1]))
+        return matches[:limit]
+
+    def candidates(self, name, max_distance=2, limit=10):
+        """
+        Return up to `limit` (name, value) pairs ranked as exact match
+        first, then names within `max_distance` edits, closest first,
+        then names starting with `name`.
+        """
+        ranked = []
+        seen = set()
+        exact = self.exact(name)
+        if exact is not None:
+            ranked.append((name.lower(), exact))
+            seen.add(name.lower())
+
+        # Closer spellings rank first, and are much cheaper to find
+        for distance in range(1, max_distance + 1):
+            if len(ranked) >= limit:
+                break
+            for _, key, value in self.fuzzy(name, distance, limit):
+                if key not in seen:
+                    ranked.append((key, value))
+                    seen.add(key)
+
+        # A prefix is a partial name, so completions of it rank last
+        if len(ranked) < limit:
+            for key, value in self.prefix(name, limit):
+                if key not in seen:
+                    ranked.append((key, value))
+                    seen.add(key)
+        return ranked[:limit]
+
+
+def grams(name):
+    """
+    Return the set of character trigrams of `name`, padded so that
+    its first and last characters appear in full trigrams.
+    """
+    padded = "\0" * (GRAM - 1) + name + "\0" * (GRAM - 1)
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Return the Levenshtein distance between `a` and `b`, or any value
+    above `limit` once it is certain to exceed it.
+    Only cells within `limit` of the diagonal are computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    beyond = limit + 1
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= limit else beyond] + [beyond] * len(b)
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        best = current[0]
+        ca = a[i - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return beyond
+        previous = current
+    return min(previous[-1], beyond)
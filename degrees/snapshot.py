@@ -0,0 +1,81 @@
+import marshal
+import mmap
+import os
+import struct
+
+# Bump whenever the layout of the snapshotted objects changes
+SNAPSHOT_VERSION = 1
+
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+HEADER = struct.Struct("<Q")
+
+
+def snapshot_path(directory):
+    """
+    Return where the snapshot for `directory` is kept.
+    """
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def snapshot_key(directory):
+    """
+    Return a key identifying the current contents of the CSV files
+    in `directory`, from their sizes and modification times.
+    """
+    key = [SNAPSHOT_VERSION]
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.append((filename, stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+
+def load_snapshot(directory, key):
+    """
+    Return the objects saved for `directory`, or None if there is
+    no readable snapshot or it was saved under a different `key`,
+    as taken by snapshot_key.
+    """
+    path = snapshot_path(directory)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # An empty file cannot be mapped
+            return None
+        with data:
+            view = memoryview(data)
+            try:
+                (key_length,) = HEADER.unpack_from(view)
+                saved_key = marshal.loads(
+                    view[HEADER.size:HEADER.size + key_length]
+                )
+                if saved_key != key:
+                    return None
+                return marshal.loads(view[HEADER.size + key_length:])
+            except (struct.error, EOFError, ValueError, TypeError):
+                return None
+            finally:
+                view.release()
+
+
+def save_snapshot(directory, objects, key):
+    """
+    Save `objects` for `directory`, tagged with `key`. The key must be
+    taken before the CSV files are read, so that a file changed during
+    the load leaves a snapshot that no longer matches it.
+    """
+    path = snapshot_path(directory)
+    key = marshal.dumps(key)
+
+    # Write to a temporary file first so readers never see half a snapshot
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(len(key)))
+        f.write(key)
+        marshal.dump(objects, f)
+    os.replace(temporary, path)
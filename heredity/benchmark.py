@@ -0,0 +1,129 @@
+import random
+import sys
+import time
+
+import heredity
+
+
+def random_family(n, known=0.5, seed=0):
+    """
+    Return `n` people in the format of `heredity.load_data`, descended
+    from one couple: each child has a chance of marrying someone from
+    outside the family and having children of their own. About a
+    `known` fraction of people have a known trait.
+    """
+    rng = random.Random(seed)
+    people = {}
+
+    def add(mother, father):
+        name = f"Person{len(people)}"
+        draw = rng.random()
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": (True if draw < known / 2 else
+                      False if draw < known else None)
+        }
+        return name
+
+    couples = [(add(None, None), add(None, None))]
+    while len(people) < n:
+        next_couples = []
+        for mother, father in couples:
+            for _ in range(rng.randint(1, 3)):
+                if len(people) >= n:
+                    break
+                child = add(mother, father)
+                if len(people) < n and rng.random() < 0.7:
+                    next_couples.append((child, add(None, None)))
+        couples = next_couples or couples
+    return people
+
+
+def empty_probabilities(people):
+    """
+    Return a `probabilities` dictionary of zeros for `people`.
+    """
+    return {
+        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
+        for person in people
+    }
+
+
+def bench_enumeration(people):
+    """
+    Return seconds taken by each brute-force enumeration engine,
+    the largest difference between their results, and the number of
+    factor table entries read by joint_probability.
+    """
+    lookups = heredity.table_lookups
+    results = {}
+    outputs = []
+    for label, engine in (("enumerate", heredity.enumerate_probabilities),
+                          ("vectorized", heredity.enumerate_probabilities_batch)):
+        probabilities = empty_probabilities(people)
+        start = time.perf_counter()
+        engine(people, probabilities)
+        heredity.normalize(probabilities)
+        results[label] = time.perf_counter() - start
+        outputs.append(probabilities)
+
+    difference = max(
+        abs(outputs[0][person][field][value] - outputs[1][person][field][value])
+        for person in people
+        for field in outputs[0][person]
+        for value in outputs[0][person][field]
+    )
+    return results, difference, heredity.table_lookups - lookups
+
+
+def bench_parallel(people, max_workers):
+    """
+    Return seconds taken by parallel enumeration with 1, 2, 4, ...
+    up to `max_workers` processes.
+    """
+    results = {}
+    workers = 1
+    while workers <= max_workers:
+        probabilities = empty_probabilities(people)
+        start = time.perf_counter()
+        heredity.enumerate_probabilities_parallel(people, probabilities, workers)
+        results[workers] = time.perf_counter() - start
+        workers *= 2
+    return results
+
+
+def main():
+    commands = ("enumerate", "parallel")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        sys.exit("Usage: python benchmark.py enumerate [min people] [max people] | "
+                 "parallel [people] [max workers]")
+
+    if sys.argv[1] == "enumerate":
+        low = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+        high = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+        print("Brute-force enumeration")
+        for n in range(low, high + 1):
+            people = random_family(n, seed=n)
+            results, difference, lookups = bench_enumeration(people)
+            timings = ", ".join(
+                f"{label} {seconds:.3f}s" for label, seconds in results.items()
+            )
+            print(f"  {n} people: {timings}, "
+                  f"{results['enumerate'] / results['vectorized']:.0f}x, "
+                  f"max difference {difference:.1e}, {lookups:,} table lookups")
+
+    elif sys.argv[1] == "parallel":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+        max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+        people = random_family(n, seed=n)
+        print(f"Parallel enumeration, {n} people")
+        results = bench_parallel(people, max_workers)
+        for workers, seconds in results.items():
+            print(f"  {workers} workers: {seconds:.3f}s, "
+                  f"{results[1] / seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
+import argparse
 import csv
 import itertools
+import multiprocessing
 import sys
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from inference import (exact_inference, gibbs_sampling,
+                       inheritance_probability, likelihood_weighting)
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,13 +46,45 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Factor tables built from PROBS, keyed on its values so that a change
+# to PROBS builds new ones, and the number of table entries
+# joint_probability has read
+factor_tables = {}
+table_lookups = 0
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python3 heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        usage="python3 heredity.py [options] data.csv"
+    )
+    parser.add_argument("data")
+    parser.add_argument("--method",
+                        choices=["exact", "enumerate", "vectorized", "parallel",
+                                 "likelihood", "gibbs"],
+                        help="compute probabilities by message passing over "
+                             "the family tree, by enumerating every "
+                             "assignment one at a time, in NumPy blocks or "
+                             "across processes, or estimate them by "
+                             "likelihood weighting or Gibbs sampling "
+                             "(default: exact with NumPy, enumerate without)")
+    parser.add_argument("--workers", type=int,
+                        help="processes used by the parallel method "
+                             "(default: one per CPU)")
+    parser.add_argument("--samples", type=int, default=10000,
+                        help="sample budget of the sampling methods")
+    parser.add_argument("--seed", type=int,
+                        help="random seed of the sampling methods")
+    parser.add_argument("--diagnostics", action="store_true",
+                        help="print convergence diagnostics of the "
+                             "sampling methods")
+    args = parser.parse_args(sys.argv[1:])
+    people = load_data(args.data)
+
+    # Every method but plain and parallel enumeration needs NumPy
+    if args.method is None:
+        args.method = "exact" if np is not None else "enumerate"
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -60,8 +102,53 @@ def main():
         for person in people
     }
 
+    diagnostics = None
+    if args.method == "exact":
+        exact_inference(people, probabilities, PROBS)
+    elif args.method == "likelihood":
+        diagnostics = likelihood_weighting(people, probabilities, PROBS,
+                                           args.samples, seed=args.seed)
+    elif args.method == "gibbs":
+        diagnostics = gibbs_sampling(people, probabilities, PROBS,
+                                     args.samples, seed=args.seed)
+    elif args.method == "vectorized":
+        enumerate_probabilities_batch(people, probabilities)
+    elif args.method == "parallel":
+        enumerate_probabilities_parallel(people, probabilities, args.workers)
+    else:
+        enumerate_probabilities(people, probabilities)
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+    if args.diagnostics and diagnostics is not None:
+        print("Diagnostics:")
+        if "effective_samples" in diagnostics:
+            print(f"  Effective samples: {diagnostics['effective_samples']:.1f}")
+        for person, values in diagnostics["people"].items():
+            print(f"  {person}: " + ", ".join(
+                f"{name} {value:.4f}" for name, value in values.items()
+            ))
+
+
+def enumerate_probabilities(people, probabilities):
+    """
+    Add to `probabilities` the joint probability of every assignment
+    of genes and traits consistent with the known traits in `people`.
+    """
+
     # Loop over all sets of people who might have the trait
     names = set(people)
+    tables = get_factor_tables()
     for have_trait in powerset(names):
 
         # Check if current set of people violates known information
@@ -78,21 +165,137 @@ def main():
             for two_genes in powerset(names - one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
+                p = joint_probability(people, one_gene, two_genes, have_trait,
+                                      tables)
 
                 update(probabilities, one_gene, two_genes, have_trait, p)
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+def enumerate_probabilities_parallel(people, probabilities, workers=None,
+                                     chunks_per_worker=4):
+    """
+    Add to `probabilities` the joint probability of every assignment
+    consistent with the known traits in `people`, like
+    enumerate_probabilities, spread over a pool of `workers` processes.
+
+    Assignments are split by their (have_trait, one_gene) sets, so the
+    work divides evenly even when every trait is known. Each worker sums
+    the joint probabilities of its share into its own partial
+    `probabilities`, and the partial sums are added up at the end.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    names = set(people)
+    known = {person for person in names if people[person]["trait"]}
+    unknown = {person for person in names if people[person]["trait"] is None}
+    pairs = [
+        (known | have_unknown, one_gene)
+        for have_unknown in powerset(unknown)
+        for one_gene in powerset(names)
+    ]
+    # Deal pairs out in turn, since powerset lists small sets first
+    # and smaller one_gene sets leave more two_genes sets to try
+    count = min(len(pairs), workers * chunks_per_worker)
+    chunks = [pairs[i::count] for i in range(count)]
+
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=_set_people,
+                                  initargs=(people,)) as pool:
+            partials = pool.imap_unordered(_enumerate_chunk, chunks)
+            for partial in partials:
+                _add_probabilities(probabilities, partial)
+    else:
+        _set_people(people)
+        for chunk in chunks:
+            _add_probabilities(probabilities, _enumerate_chunk(chunk))
+
+
+# People enumerated over by the current worker process
+_people = None
+
+
+def _set_people(people):
+    global _people
+    _people = people
+
+
+def _enumerate_chunk(pairs):
+    """
+    Return partial `probabilities` summed over every assignment
+    with one of the given (have_trait, one_gene) pairs.
+    """
+    names = set(_people)
+    partial = {
+        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
+        for person in _people
+    }
+    tables = get_factor_tables()
+    for have_trait, one_gene in pairs:
+        for two_genes in powerset(names - one_gene):
+            p = joint_probability(_people, one_gene, two_genes, have_trait,
+                                  tables)
+            update(partial, one_gene, two_genes, have_trait, p)
+    return partial
+
+
+def _add_probabilities(probabilities, partial):
+    for person in partial:
+        for field in partial[person]:
+            for value, p in partial[person][field].items():
+                probabilities[person][field][value] += p
+
+
+def enumerate_probabilities_batch(people, probabilities, block_size=1 << 16):
+    """
+    Fill `probabilities` with the normalized totals of the joint
+    probability of every assignment consistent with the known traits
+    in `people`, like enumerate_probabilities, but evaluating
+    `block_size` assignments at a time with NumPy.
+
+    Assignments are numbered in mixed radix: each person's gene count
+    is a base-3 digit, and each unknown trait a base-2 digit, so every
+    block is decoded from a range of integers.
+    """
+    if np is None:
+        raise RuntimeError("vectorized enumeration requires NumPy")
+
+    names = list(people)
+    n = len(names)
+    unknown = [i for i, person in enumerate(names)
+               if people[person]["trait"] is None]
+    known = np.array([people[person]["trait"] is True for person in names],
+                     dtype=np.int64)
+    gene_place = 3 ** np.arange(n, dtype=np.int64)
+    trait_place = 2 ** np.arange(len(unknown), dtype=np.int64)
+    total = 3 ** n * 2 ** len(unknown)
+
+    # Each person's gene and trait totals, counted in one flat bincount
+    gene_totals = np.zeros(3 * n)
+    trait_totals = np.zeros(2 * n)
+    gene_offsets = 3 * np.arange(n)
+    trait_offsets = 2 * np.arange(n)
+    for start in range(0, total, block_size):
+        index = np.arange(start, min(start + block_size, total), dtype=np.int64)
+        gene_index, trait_index = np.divmod(index, 2 ** len(unknown))
+        genes = gene_index[:, None] // gene_place % 3
+        traits = np.repeat(known[None, :], len(index), axis=0)
+        traits[:, unknown] = trait_index[:, None] // trait_place % 2
+
+        p = joint_probability_batch(people, genes, traits)
+        weights = np.repeat(p, n)
+        gene_totals += np.bincount((genes + gene_offsets).ravel(),
+                                   weights=weights, minlength=3 * n)
+        trait_totals += np.bincount((traits + trait_offsets).ravel(),
+                                    weights=weights, minlength=2 * n)
+
+    gene_totals = gene_totals.reshape(n, 3)
+    trait_totals = trait_totals.reshape(n, 2)
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+    trait_totals /= trait_totals.sum(axis=1, keepdims=True)
+    for i, person in enumerate(names):
+        for genes in (2, 1, 0):
+            probabilities[person]["gene"][genes] = gene_totals[i, genes]
+        probabilities[person]["trait"][True] = trait_totals[i, 1]
+        probabilities[person]["trait"][False] = trait_totals[i, 0]
 
 
 def load_data(filename):
@@ -129,7 +332,56 @@ def powerset(s):
     ]
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def probs_key(probs):
+    """
+    Return a hashable snapshot of the values in `probs`.
+    """
+    return (
+        tuple(sorted(probs["gene"].items())),
+        tuple((genes, tuple(sorted(traits.items())))
+              for genes, traits in sorted(probs["trait"].items())),
+        probs["mutation"]
+    )
+
+
+def get_factor_tables(probs=None):
+    """
+    Return (founder, child) tables of each person's factor for `probs`
+    (PROBS by default), building them only the first time those
+    probabilities are seen.
+
+    founder[genes][trait] is the probability that a person without
+    known parents has `genes` copies of the gene and has the trait
+    (trait 1) or not (trait 0). child[genes][mother][father][trait]
+    is the same for a child of parents with `mother` and `father`
+    copies of the gene.
+    """
+    if probs is None:
+        probs = PROBS
+    key = probs_key(probs)
+    if key not in factor_tables:
+        founder = [
+            [probs["gene"][genes] * probs["trait"][genes][trait]
+             for trait in (False, True)]
+            for genes in (0, 1, 2)
+        ]
+        child = [
+            [
+                [
+                    [probs["trait"][genes][trait]
+                     * inheritance_probability(genes, mother, father, probs)
+                     for trait in (False, True)]
+                    for father in (0, 1, 2)
+                ]
+                for mother in (0, 1, 2)
+            ]
+            for genes in (0, 1, 2)
+        ]
+        factor_tables[key] = (founder, child)
+    return factor_tables[key]
+
+
+def joint_probability(people, one_gene, two_genes, have_trait, tables=None):
     """
     Compute and return a joint probability.
 
@@ -139,74 +391,58 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    `tables` are the factor tables for PROBS, which callers making many
+    calls can fetch once with get_factor_tables.
     """
-    entire_joint_prob = []
-    num_gene = {}
+    global table_lookups
+    founder, child = tables or get_factor_tables()
 
-    for person in people:
-
-        if person in one_gene:
-            num_gene[person] = 1
-        elif person in two_genes:
-            num_gene[person] = 2
-        # no genes
-        else:
-            num_gene[person] = 0
+    num_gene = dict.fromkeys(people, 0)
+    for person in one_gene:
+        num_gene[person] = 1
+    for person in two_genes:
+        num_gene[person] = 2
 
+    # Each person's factor depends only on their own and their parents'
+    # gene counts and their trait, so it is read from a table
+    final_total = 1
     for person in people:
+        mother = people[person]['mother']
+        trait = person in have_trait
+        if mother is None:
+            final_total *= founder[num_gene[person]][trait]
+        else:
+            father = people[person]['father']
+            final_total *= child[num_gene[person]][num_gene[mother]][num_gene[father]][trait]
+    table_lookups += len(people)
 
-        if people[person]['mother'] != None:
+    return final_total
 
-            mother = people[person]['mother']
-            father = people[person]['father']
-            
-            if num_gene[mother] == 2:
-                get_mom_gene = 1 - PROBS["mutation"]
-            elif num_gene[mother] == 1:
-                get_mom_gene = 0.5
-            else:
-                get_mom_gene = PROBS["mutation"]
-
-            if num_gene[father] == 2:
-                get_dad_gene = 1 - PROBS["mutation"]
-            elif num_gene[father] == 1:
-                get_dad_gene = 0.5
-            else:
-                get_dad_gene = PROBS["mutation"]
-
-            # one copy
-            if person in one_gene:
-                gene_prob = get_mom_gene * (1 - get_dad_gene) + get_dad_gene * (1 - get_mom_gene)
-
-            # two copies
-            elif person in two_genes:
-                gene_prob = get_mom_gene * get_dad_gene
-
-            # no copies
-            else:
-                gene_prob = (1 - get_mom_gene) * (1 - get_dad_gene)
-
-            if person in have_trait:
-                total_child = PROBS["trait"][num_gene[person]][True] * gene_prob
-                entire_joint_prob.append(total_child)
-            else:
-                total_child = PROBS["trait"][num_gene[person]][False] * gene_prob
-                entire_joint_prob.append(total_child)      
-
-        elif people[person]['mother'] == None:
-
-            if person in have_trait:
-                total_parent = PROBS["gene"][num_gene[person]] * PROBS["trait"][num_gene[person]][True]
-            else:
-                total_parent = PROBS["gene"][num_gene[person]] * PROBS["trait"][num_gene[person]][False]
-       
-            entire_joint_prob.append(total_parent)
 
-    final_total = 1
-    for prob in entire_joint_prob:   
-        final_total *= prob
+def joint_probability_batch(people, genes, traits):
+    """
+    Compute and return the joint probabilities of a block of assignments.
 
-    return final_total
+    `genes` is an array with a row for each assignment and a column for
+    each person, in the order of `people`, holding that person's number
+    of copies of the gene; `traits` is laid out the same way, holding 1
+    if the person has the trait and 0 if not. Return an array with the
+    joint probability of each row, as joint_probability would compute.
+    """
+    column = {person: i for i, person in enumerate(people)}
+    founder, child = (np.array(table) for table in get_factor_tables())
+
+    p = np.ones(len(genes))
+    for person, i in column.items():
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is None:
+            p *= founder[genes[:, i], traits[:, i]]
+        else:
+            p *= child[genes[:, i], genes[:, column[mother]],
+                       genes[:, column[father]], traits[:, i]]
+    return p
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
@@ -0,0 +1,472 @@
+import heapq
+import itertools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of copies of the gene a person can have
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Non-negative function of some people's gene counts, stored as an
+    array with one axis of length 3 for each of `variables`, in order.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = table
+
+
+def passing_probability(genes, probs):
+    """
+    Return the probability that a parent with `genes` copies of the
+    gene passes one on to their child.
+    """
+    if genes == 2:
+        return 1 - probs["mutation"]
+    if genes == 1:
+        return 0.5
+    return probs["mutation"]
+
+
+def inheritance_probability(genes, mother_genes, father_genes, probs):
+    """
+    Return the probability that a child of parents with `mother_genes`
+    and `father_genes` copies of the gene has `genes` copies.
+    """
+    mom = passing_probability(mother_genes, probs)
+    dad = passing_probability(father_genes, probs)
+    if genes == 2:
+        return mom * dad
+    if genes == 1:
+        return mom * (1 - dad) + dad * (1 - mom)
+    return (1 - mom) * (1 - dad)
+
+
+def inheritance_table(probs):
+    """
+    Return a 3 x 3 x 3 array of inheritance_probability, indexed by
+    the child's, mother's and father's gene counts.
+    """
+    table = np.empty((3, 3, 3))
+    for genes, mother_genes, father_genes in itertools.product(GENES, repeat=3):
+        table[genes, mother_genes, father_genes] = inheritance_probability(
+            genes, mother_genes, father_genes, probs
+        )
+    return table
+
+
+def person_factor(people, person, probs, inheritance):
+    """
+    Return the factor for `person`: the probability of their gene count
+    given their parents' (or unconditionally, without known parents),
+    times the probability of their trait if it is known. `inheritance`
+    is the inheritance_table for `probs`.
+    """
+    trait = people[person]["trait"]
+    if trait is None:
+        evidence = np.ones(3)
+    else:
+        evidence = np.array([probs["trait"][genes][trait] for genes in GENES])
+
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    if mother is None:
+        prior = np.array([probs["gene"][genes] for genes in GENES])
+        return Factor((person,), prior * evidence)
+    return Factor((person, mother, father),
+                  inheritance * evidence[:, None, None])
+
+
+def sum_product(factors, variables):
+    """
+    Return the product of `factors` with every variable not in
+    `variables` summed out, scaled to sum to 1, which keeps messages
+    from underflowing in large families.
+    """
+    labels = {}
+    operands = []
+    for factor in factors:
+        operands.append(factor.table)
+        operands.append([labels.setdefault(variable, len(labels))
+                         for variable in factor.variables])
+    table = np.einsum(*operands, [labels[variable] for variable in variables])
+    total = table.sum()
+    if total:
+        table = table / total
+    return Factor(variables, table)
+
+
+def elimination_order(people):
+    """
+    Return (order, cliques): an order in which to sum out everyone's
+    gene count, chosen greedily to add the fewest fill-in edges, and
+    for each person the clique of people joined when they are
+    eliminated, starting with that person.
+
+    Two people are joined if they appear in one factor: a child
+    and both of their parents.
+    """
+    neighbors = {person: set() for person in people}
+    for person in people:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is not None:
+            for a, b in ((person, mother), (person, father), (mother, father)):
+                neighbors[a].add(b)
+                neighbors[b].add(a)
+
+    def fill_in(person):
+        adjacent = list(neighbors[person])
+        return sum(
+            1 for i, a in enumerate(adjacent) for b in adjacent[i + 1:]
+            if b not in neighbors[a]
+        )
+
+    # Heap of (fill-in, degree, position, person), where entries whose
+    # scores have since changed are skipped when they come up
+    position = {person: i for i, person in enumerate(people)}
+    score = {}
+    heap = []
+    for person in people:
+        score[person] = (fill_in(person), len(neighbors[person]))
+        heap.append((*score[person], position[person], person))
+    heapq.heapify(heap)
+
+    order = []
+    cliques = {}
+    while heap:
+        fill, degree, _, person = heapq.heappop(heap)
+        if score.get(person) != (fill, degree):
+            continue
+        adjacent = neighbors.pop(person)
+        del score[person]
+        order.append(person)
+        cliques[person] = (person, *adjacent)
+
+        # Join the remaining neighbors, as summing out `person` would
+        for a in adjacent:
+            neighbors[a].discard(person)
+            neighbors[a].update(b for b in adjacent if b != a)
+
+        # Only scores of people next to a changed neighborhood can change
+        affected = set(adjacent)
+        for a in adjacent:
+            affected.update(neighbors[a])
+        for a in affected:
+            score[a] = (fill_in(a), len(neighbors[a]))
+            heapq.heappush(heap, (*score[a], position[a], a))
+
+    return order, cliques
+
+
+def exact_inference(people, probabilities, probs):
+    """
+    Fill `probabilities` with each person's exact gene and trait
+    distributions, given the known traits in `people`.
+
+    Rather than enumerating every assignment, this builds a clique tree
+    from a min-fill elimination order over the family graph and passes
+    sum-product messages up and back down it, so the cost grows with
+    the number of people times the size of the largest clique, which
+    stays small for family trees.
+    """
+    if np is None:
+        raise RuntimeError("exact inference requires NumPy")
+
+    order, cliques = elimination_order(people)
+    step = {person: i for i, person in enumerate(order)}
+
+    # Each clique's parent is the clique of the first person eliminated
+    # from the rest of it, whose clique contains all of the rest
+    parent = {}
+    children = {person: [] for person in order}
+    for person in order:
+        rest = cliques[person][1:]
+        if rest:
+            parent[person] = min(rest, key=step.__getitem__)
+            children[parent[person]].append(person)
+
+    # Each factor goes to the clique of its first eliminated person
+    potentials = {
+        person: [Factor(cliques[person], np.ones((3,) * len(cliques[person])))]
+        for person in order
+    }
+    inheritance = inheritance_table(probs)
+    for person in people:
+        factor = person_factor(people, person, probs, inheritance)
+        potentials[min(factor.variables, key=step.__getitem__)].append(factor)
+
+    # Pass messages from the leaves up to the roots
+    upward = {}
+    for person in order:
+        if person in parent:
+            factors = potentials[person] + [upward[c] for c in children[person]]
+            upward[person] = sum_product(factors, cliques[person][1:])
+
+    # Pass messages back down, reading off each person's marginal
+    downward = {}
+    for person in reversed(order):
+        factors = potentials[person] + [upward[c] for c in children[person]]
+        if person in downward:
+            factors.append(downward[person])
+        genes = sum_product(factors, (person,)).table.tolist()
+        for child in children[person]:
+            others = [factor for factor in factors if factor is not upward[child]]
+            downward[child] = sum_product(others, cliques[child][1:])
+
+        fill_person(probabilities, people, person, genes, probs)
+
+
+def fill_person(probabilities, people, person, genes, probs):
+    """
+    Set `person`'s entries of `probabilities` from `genes`, their
+    distribution over gene counts. An unknown trait gets the
+    distribution those gene counts imply, a known one certainty.
+    """
+    trait = people[person]["trait"]
+    for count in GENES:
+        probabilities[person]["gene"][count] = float(genes[count])
+    for value in (True, False):
+        if trait is None:
+            probabilities[person]["trait"][value] = sum(
+                genes[count] * probs["trait"][count][value]
+                for count in GENES
+            )
+        else:
+            probabilities[person]["trait"][value] = float(trait == value)
+
+
+def parents_first(people):
+    """
+    Return the people in an order where everyone comes after
+    their parents.
+    """
+    order = []
+    placed = set()
+    for person in people:
+        stack = [person]
+        while stack:
+            current = stack[-1]
+            if current in placed:
+                stack.pop()
+                continue
+            parents = [parent for parent in (people[current]["mother"],
+                                             people[current]["father"])
+                       if parent is not None and parent not in placed]
+            if parents:
+                stack.extend(parents)
+            else:
+                placed.add(current)
+                order.append(current)
+                stack.pop()
+    return order
+
+
+def sample_categorical(weights, rng):
+    """
+    Return one index drawn from each row of `weights`, in proportion
+    to that row's (not necessarily normalized) weights.
+    """
+    cumulative = np.cumsum(weights, axis=1)
+    draws = rng.random(len(weights))[:, None] * cumulative[:, -1:]
+    return (draws >= cumulative).sum(axis=1)
+
+
+def likelihood_weighting(people, probabilities, probs, samples=10000,
+                         batches=20, seed=None):
+    """
+    Fill `probabilities` with each person's gene and trait distributions
+    estimated by likelihood weighting over `samples` samples.
+
+    Each sample draws everyone's gene count forward from their parents'
+    and is weighted by the probability of the known traits given those
+    gene counts. Samples are drawn in `batches` batches of people side
+    by side with NumPy, with weights kept as logarithms so that large
+    families do not underflow.
+
+    Return diagnostics: "effective_samples", the number of equally
+    weighted samples the weights are worth, and for each person in
+    "people" their "stderr", the largest standard error of any of their
+    gene probabilities, estimated from the spread between batches.
+    """
+    if np is None:
+        raise RuntimeError("likelihood weighting requires NumPy")
+
+    rng = np.random.default_rng(seed)
+    order = parents_first(people)
+    column = {person: i for i, person in enumerate(order)}
+    prior = np.array([probs["gene"][count] for count in GENES])
+    inheritance = inheritance_table(probs)
+    log_evidence = {
+        person: np.log([probs["trait"][count][people[person]["trait"]]
+                        for count in GENES])
+        for person in order if people[person]["trait"] is not None
+    }
+
+    batches = max(1, min(batches, samples))
+    scales = []
+    totals = []
+    weight_sums = []
+    square_sums = []
+    for batch in range(batches):
+        size = samples // batches + (batch < samples % batches)
+        genes = np.empty((size, len(order)), dtype=np.int64)
+        log_weights = np.zeros(size)
+        for i, person in enumerate(order):
+            mother = people[person]["mother"]
+            if mother is None:
+                genes[:, i] = sample_categorical(
+                    np.broadcast_to(prior, (size, 3)), rng
+                )
+            else:
+                father = people[person]["father"]
+                genes[:, i] = sample_categorical(
+                    inheritance[:, genes[:, column[mother]],
+                                genes[:, column[father]]].T, rng
+                )
+            if person in log_evidence:
+                log_weights += log_evidence[person][genes[:, i]]
+
+        scale = log_weights.max()
+        weights = np.exp(log_weights - scale)
+        scales.append(scale)
+        weight_sums.append(weights.sum())
+        square_sums.append((weights * weights).sum())
+        totals.append(np.bincount(
+            (genes + 3 * np.arange(len(order))).ravel(),
+            weights=np.repeat(weights, len(order)), minlength=3 * len(order)
+        ).reshape(len(order), 3))
+
+    # Bring every batch's weights to a common scale before pooling them
+    scales = np.exp(np.array(scales) - max(scales))
+    weight_sums = np.array(weight_sums)
+    totals = np.array(totals)
+    pooled = (scales[:, None, None] * totals).sum(axis=0)
+    pooled /= (scales * weight_sums).sum()
+    effective = ((scales * weight_sums).sum() ** 2
+                 / (scales ** 2 * np.array(square_sums)).sum())
+
+    estimates = totals / weight_sums[:, None, None]
+    if batches > 1:
+        stderr = estimates.std(axis=0, ddof=1).max(axis=1) / np.sqrt(batches)
+    else:
+        stderr = np.full(len(order), np.nan)
+
+    for person, i in column.items():
+        fill_person(probabilities, people, person, pooled[i], probs)
+    return {
+        "effective_samples": float(effective),
+        "people": {
+            person: {"stderr": float(stderr[i])} for person, i in column.items()
+        }
+    }
+
+
+def gibbs_sampling(people, probabilities, probs, samples=10000, chains=10,
+                   burn_in=100, seed=None):
+    """
+    Fill `probabilities` with each person's gene and trait distributions
+    estimated by Gibbs sampling over everyone's gene count, counting
+    `samples` states in total across `chains` independent chains.
+
+    Each chain starts from a draw from the prior and, in every sweep,
+    redraws each person's gene count given everyone else's: in proportion
+    to their own factor, the probability of their known trait, and the
+    factors of their children. The first `burn_in` sweeps are not
+    counted. Chains run side by side with NumPy.
+
+    Return diagnostics: for each person in "people" their "rhat", the
+    largest Gelman-Rubin statistic of any of their gene probabilities
+    (near 1 once chains agree), and their "stderr", the largest standard
+    error estimated from the spread between chains.
+    """
+    if np is None:
+        raise RuntimeError("Gibbs sampling requires NumPy")
+
+    rng = np.random.default_rng(seed)
+    order = parents_first(people)
+    column = {person: i for i, person in enumerate(order)}
+    n = len(order)
+    prior = np.array([probs["gene"][count] for count in GENES])
+    inheritance = inheritance_table(probs)
+    evidence = {
+        person: np.array([
+            1 if people[person]["trait"] is None
+            else probs["trait"][count][people[person]["trait"]]
+            for count in GENES
+        ])
+        for person in order
+    }
+    children = {person: [] for person in order}
+    for person in order:
+        if people[person]["mother"] is not None:
+            children[people[person]["mother"]].append(person)
+            children[people[person]["father"]].append(person)
+
+    chains = max(2, chains)
+    sweeps = -(-samples // chains)
+    state = np.empty((chains, n), dtype=np.int64)
+    for i, person in enumerate(order):
+        mother = people[person]["mother"]
+        if mother is None:
+            state[:, i] = sample_categorical(
+                np.broadcast_to(prior, (chains, 3)), rng
+            )
+        else:
+            father = people[person]["father"]
+            state[:, i] = sample_categorical(
+                inheritance[:, state[:, column[mother]],
+                            state[:, column[father]]].T, rng
+            )
+
+    # Times each chain visited each gene count of each person
+    counts = np.zeros(chains * n * 3)
+    offsets = (3 * np.arange(n) + 3 * n * np.arange(chains)[:, None]).ravel()
+    for sweep in range(burn_in + sweeps):
+        for i, person in enumerate(order):
+            mother = people[person]["mother"]
+            if mother is None:
+                weights = np.broadcast_to(prior * evidence[person], (chains, 3))
+            else:
+                father = people[person]["father"]
+                weights = (inheritance[:, state[:, column[mother]],
+                                       state[:, column[father]]].T
+                           * evidence[person])
+            for child in children[person]:
+                c = column[child]
+                if people[child]["mother"] == person:
+                    other = state[:, column[people[child]["father"]]]
+                    weights = weights * inheritance[state[:, c], :, other]
+                else:
+                    other = state[:, column[people[child]["mother"]]]
+                    weights = weights * inheritance[state[:, c], other, :]
+            state[:, i] = sample_categorical(weights, rng)
+        if sweep >= burn_in:
+            counts += np.bincount(state.ravel() + offsets, minlength=len(counts))
+
+    # Each chain's share of sweeps spent in each gene count, and the
+    # Gelman-Rubin comparison of the variance within and between chains
+    means = counts.reshape(chains, n, 3) / sweeps
+    within = (means * (1 - means)).mean(axis=0) * sweeps / max(1, sweeps - 1)
+    between = means.var(axis=0, ddof=1) * sweeps
+    pooled = (sweeps - 1) / sweeps * within + between / sweeps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rhat = np.sqrt(np.where(within > 0, pooled / within,
+                                np.where(between > 0, np.inf, 1)))
+    stderr = means.std(axis=0, ddof=1) / np.sqrt(chains)
+
+    estimates = means.mean(axis=0)
+    for person, i in column.items():
+        fill_person(probabilities, people, person, estimates[i], probs)
+    return {
+        "people": {
+            person: {"rhat": float(rhat[i].max()),
+                     "stderr": float(stderr[i].max())}
+            for person, i in column.items()
+        }
+    }
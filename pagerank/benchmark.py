@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import generate
+import pagerank
+
+
+def random_corpus(n, links=10, seed=0):
+    """
+    Return a corpus of `n` pages, each linking to up to `links`
+    random other pages.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    for i in range(n):
+        page = f"{i}.html"
+        corpus[page] = {
+            f"{rng.randrange(n)}.html" for _ in range(rng.randrange(links + 1))
+        } - {page}
+    return corpus
+
+
+def bench_sampling(corpus, samples):
+    """
+    Return samples per second for each sampling engine.
+    """
+    results = {}
+    for label, sampler in (("walk", pagerank.sample_pagerank),
+                           ("vectorized", pagerank.sample_pagerank_vectorized)):
+        start = time.perf_counter()
+        sampler(corpus, pagerank.DAMPING, samples)
+        results[label] = samples / (time.perf_counter() - start)
+    return results
+
+
+def bench_personalized(corpus, vectors, seed=0):
+    """
+    Return personalization vectors per second, computing `vectors`
+    random single-page personalizations one at a time and as one batch.
+    """
+    rng = np.random.default_rng(seed)
+    pages, sources, targets, out_degree = pagerank.transition_matrix(corpus)
+    n = len(pages)
+    teleports = np.zeros((n, vectors))
+    teleports[rng.integers(n, size=vectors), np.arange(vectors)] = 1
+
+    results = {}
+    start = time.perf_counter()
+    for j in range(vectors):
+        pagerank.power_iteration_batch(n, sources, targets, out_degree,
+                                       pagerank.DAMPING, teleports[:, j:j + 1])
+    results["one at a time"] = vectors / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    pagerank.power_iteration_batch(n, sources, targets, out_degree,
+                                   pagerank.DAMPING, teleports)
+    results["batched"] = vectors / (time.perf_counter() - start)
+    return results
+
+
+def measure(function, *args):
+    """
+    Call `function(*args)` in a forked child process, so that each
+    measurement starts from the same memory state.
+    Return (seconds, peak, added): the child's wall time, its peak
+    resident memory in bytes, and how far that peak rose above its
+    resident memory when the call began. Memory is None where the
+    platform does not report it, and without fork the call runs in
+    this process.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return _measured_call(function, args)
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    child = context.Process(target=_report_call,
+                            args=(sender, function, args))
+    child.start()
+    sender.close()
+    result = receiver.recv()
+    child.join()
+    return result
+
+
+def _report_call(connection, function, args):
+    connection.send(_measured_call(function, args))
+    connection.close()
+
+
+def _measured_call(function, args):
+    before = current_rss()
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    peak = peak_rss()
+    added = peak - before if peak is not None and before is not None else None
+    return seconds, peak, added
+
+
+def current_rss():
+    """
+    Return the resident memory of this process in bytes, or None
+    where it cannot be read from /proc.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss():
+    """
+    Return the peak resident memory of this process in bytes,
+    or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def transition_models(corpus):
+    """
+    Compute the transition model of every page, as a surfer visiting
+    each page once would.
+    """
+    for page in corpus:
+        pagerank.transition_model(corpus, page, pagerank.DAMPING)
+
+
+def bench_scaling(sizes, samples=pagerank.SAMPLES, seed=0):
+    """
+    Generate a power-law corpus of each size in `sizes` and time
+    crawling it, building every page's transition model, sampling
+    `samples` pages and iterating to convergence.
+    Yield a result for each size and stage as it finishes, a dict of
+    the stage, pages, links, seconds, and peak and added resident
+    memory in bytes.
+    """
+    for n in sizes:
+        corpus = generate.power_law_corpus(n, seed=seed)
+        links = sum(len(corpus[page]) for page in corpus)
+        with tempfile.TemporaryDirectory() as directory:
+            generate.write_corpus(corpus, directory)
+            stages = (
+                ("crawl", pagerank.crawl, (directory,)),
+                ("transition_model", transition_models, (corpus,)),
+                ("sample_pagerank", pagerank.sample_pagerank,
+                 (corpus, pagerank.DAMPING, samples)),
+                ("iterate_pagerank", pagerank.iterate_pagerank,
+                 (corpus, pagerank.DAMPING)),
+            )
+            for stage, function, args in stages:
+                seconds, peak, added = measure(function, *args)
+                yield {
+                    "stage": stage, "pages": n, "links": links,
+                    "seconds": seconds, "peak_rss": peak, "added_rss": added
+                }
+
+
+def main():
+    commands = ("sample", "personalized", "scale")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        sys.exit("Usage: python benchmark.py sample [pages] [samples] | "
+                 "personalized [pages] [vectors] | "
+                 "scale [sizes] [report.json]")
+
+    if sys.argv[1] == "sample":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        samples = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+        corpus = random_corpus(n)
+        print(f"Sampling throughput, {n} pages, {samples} samples")
+        for label, rate in bench_sampling(corpus, samples).items():
+            print(f"  {label}: {rate:,.0f} samples/s")
+
+    elif sys.argv[1] == "personalized":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        vectors = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+        corpus = random_corpus(n)
+        print(f"Personalized PageRank throughput, {n} pages, {vectors} vectors")
+        for label, rate in bench_personalized(corpus, vectors).items():
+            print(f"  {label}: {rate:,.1f} vectors/s")
+
+    elif sys.argv[1] == "scale":
+        sizes = sys.argv[2] if len(sys.argv) > 2 else "100,1000,5000"
+        sizes = [int(size) for size in sizes.split(",")]
+        path = sys.argv[3] if len(sys.argv) > 3 else "scaling.json"
+        print(f"Scaling, {pagerank.SAMPLES} samples")
+        results = []
+        for result in bench_scaling(sizes):
+            results.append(result)
+            memory = ""
+            if result["added_rss"] is not None:
+                memory = f", +{result['added_rss'] / 2 ** 20:.1f} MiB"
+            print(f"  {result['pages']} pages, {result['stage']}: "
+                  f"{result['seconds']:.3f}s{memory}")
+        with open(path, "w") as f:
+            json.dump({"samples": pagerank.SAMPLES, "damping": pagerank.DAMPING,
+                       "results": results}, f, indent=2)
+        print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import sys
+from itertools import accumulate
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{title}</title>
+    </head>
+    <body>
+        <h1>{title}</h1>
+
+        <div>Links:</div>
+        <ul>
+{items}
+        </ul>
+    </body>
+</html>
+"""
+
+ITEM = '            <li><a href="{page}">{title}</a></li>'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python generate.py [options] directory pages"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("pages", type=int)
+    parser.add_argument("--links", type=float, default=8,
+                        help="mean number of links per page")
+    parser.add_argument("--out-exponent", type=float, default=2.5,
+                        help="power-law exponent of the out-degrees")
+    parser.add_argument("--in-exponent", type=float, default=1.0,
+                        help="Zipf exponent of how often pages are linked to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(sys.argv[1:])
+
+    corpus = power_law_corpus(args.pages, args.links, args.out_exponent,
+                              args.in_exponent, args.seed)
+    write_corpus(corpus, args.directory)
+    links = sum(len(corpus[page]) for page in corpus)
+    print(f"Wrote {len(corpus)} pages with {links} links to {args.directory}")
+
+
+def power_law_corpus(n, links=8, out_exponent=2.5, in_exponent=1.0, seed=0):
+    """
+    Return a corpus of `n` pages named "0.html" to "{n - 1}.html",
+    shaped like the web: the number of links on a page follows a power
+    law with exponent `out_exponent` and mean about `links`, so most
+    pages have a few links, some have none and a few have hundreds,
+    and each link lands on a page with probability proportional to
+    1 / rank ** `in_exponent`, for a random popularity rank.
+    """
+    if n < 2:
+        raise ValueError("a corpus needs at least two pages")
+    if out_exponent <= 2:
+        raise ValueError("out_exponent must be above 2 for a finite mean")
+
+    rng = random.Random(seed)
+    pages = [f"{i}.html" for i in range(n)]
+    popular = pages[:]
+    rng.shuffle(popular)
+    cum_weights = list(accumulate(
+        1 / rank ** in_exponent for rank in range(1, n + 1)
+    ))
+
+    # paretovariate(a) - 1 has mean 1 / (a - 1) and a density
+    # falling off as x ** -(a + 1)
+    alpha = out_exponent - 1
+    scale = links * (alpha - 1)
+
+    corpus = {}
+    for page in pages:
+        degree = min(n - 1, int(scale * (rng.paretovariate(alpha) - 1) + 0.5))
+        targets = set(rng.choices(popular, cum_weights=cum_weights, k=degree))
+        targets.discard(page)
+        corpus[page] = targets
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    Write each page of `corpus` to `directory` as an HTML file in the
+    format of the bundled corpora, creating the directory if needed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        items = "\n".join(
+            ITEM.format(page=link, title=link[:-len(".html")])
+            for link in sorted(links)
+        )
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(PAGE.format(title=page[:-len(".html")], items=items))
+
+
+if __name__ == "__main__":
+    main()
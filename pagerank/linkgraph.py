@@ -0,0 +1,138 @@
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b"PRLG"
+# Bump whenever the file layout changes
+VERSION = 1
+
+# Magic, version, number of pages, number of links, bytes of page names
+HEADER = struct.Struct("<4sIQQQ")
+
+
+class LinkGraph(Mapping):
+    """
+    Link structure of a corpus with pages interned to dense integers,
+    read-only and shaped like the dictionaries `crawl` returns.
+
+    Links are stored in CSR form: page `i` links to the pages
+    `targets[offsets[i]:offsets[i + 1]]`. Loaded from a file, both
+    arrays are views of the memory-mapped file, so nothing is read
+    until it is used.
+    """
+
+    def __init__(self, pages, offsets, targets):
+        self.pages = pages
+        self.offsets = offsets
+        self.targets = targets
+        # Maps page names to indices, built on first lookup by name
+        self.index = None
+
+    def links_of(self, i):
+        """
+        Returns the indices of the pages page `i` links to.
+        """
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, page):
+        if self.index is None:
+            self.index = {page: i for i, page in enumerate(self.pages)}
+        pages = self.pages
+        return {pages[j] for j in self.links_of(self.index[page])}
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def to_corpus(self):
+        """
+        Return the graph as a dictionary mapping each page
+        to the set of pages it links to.
+        """
+        pages = self.pages
+        return {
+            page: {pages[j] for j in self.links_of(i)}
+            for i, page in enumerate(pages)
+        }
+
+
+def graph_from_corpus(corpus):
+    """
+    Return a LinkGraph of a dictionary mapping each page
+    to the set of pages it links to, such as `crawl` returns.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    offsets = array("q", [0])
+    targets = array("i")
+    for page in pages:
+        targets.extend(sorted(map(index.__getitem__, corpus[page])))
+        offsets.append(len(targets))
+    return LinkGraph(pages, offsets, targets)
+
+
+def save_graph(path, graph):
+    """
+    Save a LinkGraph, or a dictionary mapping each page to the set
+    of pages it links to, to `path`.
+
+    The file holds a header, the offsets as 64-bit integers, the link
+    targets as 32-bit integers and the page names as newline-separated
+    UTF-8, so that both arrays can be mapped straight from the file.
+    """
+    if not isinstance(graph, LinkGraph):
+        graph = graph_from_corpus(graph)
+    if len(graph.pages) >= 2 ** 31:
+        raise ValueError("too many pages for 32-bit link targets")
+    names = "\n".join(graph.pages).encode("utf-8")
+    offsets = array("q", graph.offsets)
+    targets = array("i", graph.targets)
+
+    # Write to a temporary file first so readers never see half a graph
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(graph.pages), len(targets),
+                            len(names)))
+        offsets.tofile(f)
+        targets.tofile(f)
+        f.write(names)
+    os.replace(temporary, path)
+
+
+def load_graph(path):
+    """
+    Return the LinkGraph saved at `path`, with its offsets and targets
+    mapped from the file rather than read into memory.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{path} is not a link graph") from None
+
+    view = memoryview(data)
+    try:
+        magic, version, n, m, names_length = HEADER.unpack_from(view)
+    except struct.error:
+        raise ValueError(f"{path} is not a link graph") from None
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a link graph")
+    if version != VERSION:
+        raise ValueError(f"{path} is link graph version {version}, "
+                         f"expected {VERSION}")
+
+    start = HEADER.size
+    targets_start = start + 8 * (n + 1)
+    names_start = targets_start + 4 * m
+    if len(view) != names_start + names_length:
+        raise ValueError(f"{path} is truncated")
+
+    offsets = view[start:targets_start].cast("q")
+    targets = view[targets_start:names_start].cast("i")
+    names = bytes(view[names_start:]).decode("utf-8")
+    pages = names.split("\n") if n else []
+    return LinkGraph(pages, offsets, targets)
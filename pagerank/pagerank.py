@@ -1,18 +1,95 @@
+import argparse
+import json
+import math
+import multiprocessing
 import os
 import random
 import re
+import statistics
 import sys
-import math
+import time
+from array import array
+from collections import deque
+
+from linkgraph import LinkGraph, load_graph, save_graph
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Number of single-page rank updates made by the last incremental run
+num_updates = 0
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    parser = argparse.ArgumentParser(usage="python pagerank.py [options] corpus")
+    parser.add_argument("corpus",
+                        help="directory of HTML pages, or a saved link graph")
+    parser.add_argument("--iterate", choices=["dict", "sparse"], default="dict",
+                        help="engine used for the iterative PageRank")
+    parser.add_argument("--tolerance", type=float, default=0.001,
+                        help="stop iterating once ranks change by at most this")
+    parser.add_argument("--norm", choices=["inf", "l1"], default="inf",
+                        help="measure change as the largest or total change")
+    parser.add_argument("--max-iterations", type=int,
+                        help="stop iterating after this many iterations")
+    parser.add_argument("--method", choices=["jacobi", "gauss-seidel"],
+                        default="jacobi",
+                        help="update rule for the dict engine")
+    parser.add_argument("--trace", action="store_true",
+                        help="print the change after each iteration")
+    parser.add_argument("--personalize", action="append", metavar="PAGE",
+                        help="make random jumps land only on PAGE "
+                             "(may be repeated)")
+    parser.add_argument("--sample", choices=["walk", "vectorized", "adaptive"],
+                        default="walk",
+                        help="engine used for the sampled PageRank")
+    parser.add_argument("--target-error", type=float, default=0.005,
+                        help="adaptive sampling: stop once every 95%% "
+                             "interval is within this")
+    parser.add_argument("--top-k", type=int,
+                        help="adaptive sampling: stop once the top K pages "
+                             "keep their order")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="crawl with this many processes (0 for serial)")
+    parser.add_argument("--timings", action="store_true",
+                        help="report time spent in each crawl stage")
+    parser.add_argument("--state", metavar="FILE",
+                        help="update the iterative PageRank incrementally "
+                             "from the ranks saved in FILE, then save them")
+    parser.add_argument("--save-graph", metavar="FILE",
+                        help="save the crawled links as a binary link graph")
+    args = parser.parse_args(sys.argv[1:])
+    if os.path.isfile(args.corpus):
+        corpus = load_graph(args.corpus)
+    elif args.workers:
+        corpus = crawl_parallel(args.corpus, args.workers, args.timings)
+    else:
+        corpus = crawl(args.corpus)
+    if args.save_graph:
+        save_graph(args.save_graph, corpus)
+    samples = SAMPLES
+    if args.sample == "vectorized":
+        ranks = sample_pagerank_vectorized(corpus, DAMPING, SAMPLES)
+    elif args.sample == "adaptive":
+        ranks, report = adaptive_sample_pagerank(
+            corpus, DAMPING, target_error=args.target_error, top_k=args.top_k,
+            workers=max(1, args.workers), return_report=True
+        )
+        samples = report["samples"]
+    else:
+        ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
 
     """
     ACTUAL VALUES ADD TO 1, BUT ROUNDED VALUES ADD TO 1.0001
@@ -22,10 +99,26 @@ def main():
     #     total += value
     # print(total)
 
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    print(f"PageRank Results from Sampling (n = {samples})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    if args.state:
+        ranks = incremental_pagerank(corpus, DAMPING, args.state)
+        print(f"{num_updates} page updates")
+    elif args.iterate == "sparse":
+        ranks = iterate_pagerank_sparse(corpus, DAMPING)
+    else:
+        personalization = None
+        if args.personalize:
+            personalization = {page: 1 for page in args.personalize}
+        ranks, trace = iterate_pagerank(
+            corpus, DAMPING, args.tolerance, args.norm, args.max_iterations,
+            args.method, return_trace=True, personalization=personalization
+        )
+        if args.trace:
+            print(f"Converged after {len(trace)} iterations")
+            for i, diff in enumerate(trace):
+                print(f"  {i + 1}: {diff:.3e}")
     
     """
     ACTUAL VALUES ADD TO 1, BUT ROUNDED VALUES ADD TO 1.0001
@@ -54,7 +147,7 @@ def crawl(directory):
             continue
         with open(os.path.join(directory, filename)) as f:
             contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
+            links = LINK.findall(contents)
             pages[filename] = set(links) - {filename}
 
     # Only include links to other pages in the corpus
@@ -67,35 +160,144 @@ def crawl(directory):
     return pages
 
 
-def transition_model(corpus, page, damping_factor):
+def crawl_edges(directory, workers=None, chunk_size=1 << 16):
+    """
+    Parse a directory of HTML pages across a pool of `workers`
+    processes, reading each file `chunk_size` characters at a time.
+
+    Return (pages, sources, targets, timings): `pages` lists the page
+    names, and link `k` goes from page index `sources[k]` to page index
+    `targets[k]`. Only links to other pages in the corpus are kept.
+    `timings` holds seconds spent listing, reading, parsing and
+    merging, with reading and parsing summed over all workers.
+    """
+    start = time.perf_counter()
+    pages = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+    index = {page: i for i, page in enumerate(pages)}
+    timings = {"list": time.perf_counter() - start, "read": 0, "parse": 0}
+
+    sources = array("l")
+    targets = array("l")
+    paths = [os.path.join(directory, page) for page in pages]
+    tasks = [(path, chunk_size) for path in paths]
+    merge = 0
+    with multiprocessing.Pool(workers) as pool:
+        chunksize = max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))
+        for i, (links, read, parse) in enumerate(
+                pool.imap(extract_links, tasks, chunksize)):
+            timings["read"] += read
+            timings["parse"] += parse
+
+            # Intern links as they arrive rather than holding every page's set
+            merge_start = time.perf_counter()
+            for link in links:
+                j = index.get(link)
+                if j is not None and j != i:
+                    sources.append(i)
+                    targets.append(j)
+            merge += time.perf_counter() - merge_start
+
+    timings["merge"] = merge
+    timings["total"] = time.perf_counter() - start
+    return pages, sources, targets, timings
+
+
+def extract_links(task):
+    """
+    Return (links, read seconds, parse seconds) for the HTML file
+    given by a (path, chunk_size) task, where `links` is the set
+    of all href targets of its anchors.
+    """
+    path, chunk_size = task
+    links = set()
+    read = parse = 0
+    tail = ""
+    with open(path) as f:
+        while True:
+            read_start = time.perf_counter()
+            chunk = f.read(chunk_size)
+            parse_start = time.perf_counter()
+            read += parse_start - read_start
+
+            buffer = tail + chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+
+            # An anchor cut off by the chunk boundary starts at the last "<",
+            # and cannot have been closed by a ">" yet
+            if chunk:
+                cut = buffer.rfind("<", end)
+                if cut == -1 or buffer.find(">", cut) != -1:
+                    tail = ""
+                else:
+                    tail = buffer[cut:]
+            parse += time.perf_counter() - parse_start
+            if not chunk:
+                break
+    return links, read, parse
+
+
+def crawl_parallel(directory, workers=None, report=False):
+    """
+    Parse a directory of HTML pages like `crawl`, spreading the files
+    over a pool of `workers` processes. If `report` is true, print
+    the time spent in each stage.
+    """
+    pages, sources, targets, timings = crawl_edges(directory, workers)
+    if report:
+        print(f"Crawled {len(pages)} pages, {len(sources)} links in "
+              f"{timings['total']:.3f}s")
+        for stage in ("list", "read", "parse", "merge"):
+            print(f"  {stage}: {timings[stage]:.3f}s")
+
+    corpus = {page: set() for page in pages}
+    for i, j in zip(sources, targets):
+        corpus[pages[i]].add(pages[j])
+    return corpus
+
+
+def transition_model(corpus, page, damping_factor, personalization=None):
     """
     Return a probability distribution over which page to visit next,
     given a current page.
 
     With probability `damping_factor`, choose a link at random
     linked to by `page`. With probability `1 - damping_factor`, choose
-    a link at random chosen from all pages in the corpus.
+    a link at random chosen from all pages in the corpus, or, given a
+    `personalization` dict of page weights, from pages in proportion
+    to their weight. A page with no links is left by that random jump.
     """
-    prob_distribution = {}
+    teleport = teleport_distribution(corpus, personalization)
+    connected = corpus[page]
+    if not connected:
+        return teleport
 
-    if page == set():
-        for key in corpus:
-            prob_distribution[key] = 1 / len(corpus)
-    else:
-        for key in corpus:
-            
-            if page == key:
-                connected = corpus[key]
+    prob_distribution = {}
+    for key in corpus:
+        prob_distribution[key] = (1 - damping_factor) * teleport[key]
+    for p in connected:
+        prob_distribution[p] += damping_factor / len(connected)
 
-                for p in connected:
-                    prob_distribution[p] = damping_factor / len(connected)
+    return prob_distribution
 
-            if key in prob_distribution:
-                prob_distribution[key] += (1 - damping_factor) / len(corpus)
-            else:
-                prob_distribution[key] = (1 - damping_factor) / len(corpus)
 
-    return prob_distribution
+def teleport_distribution(corpus, personalization=None):
+    """
+    Return the distribution random jumps land on: uniform over the
+    corpus, or proportional to the weights in `personalization`,
+    where pages it leaves out get no weight.
+    """
+    if personalization is None:
+        return {key: 1 / len(corpus) for key in corpus}
+    total = sum(personalization.get(key, 0) for key in corpus)
+    if total <= 0:
+        raise ValueError("personalization must give some page positive weight")
+    return {key: personalization.get(key, 0) / total for key in corpus}
 
 
 def sample_pagerank(corpus, damping_factor, n):
@@ -107,90 +309,536 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pagerank = {}
-    total_sample = []
-    current_sample = random.choice(list(corpus))
-    total_sample.append(current_sample)
-
-    for i in range(n):
-        prob_distribution = transition_model(corpus, current_sample, damping_factor)
-        
-        prob = []
-        page = []
-        for item in prob_distribution.items():
-            page.append(item[0])
-            prob.append(item[1])
-        
-        current_sample = "".join(map(str, random.choices(page, prob)))
-        total_sample.append(current_sample)
-        
-    count = 0
-    for i in total_sample:
-        if i not in pagerank:
-            pagerank[i] = 0
-        pagerank[i] += 1
-        count += 1
-    
-    for item in pagerank.items():
-        pagerank[item[0]] = item[1] / count
-    
-    return pagerank
+    # The transition model mixes two uniform choices: a random link of
+    # the current page, or any page at all. Keeping each page's links in
+    # a tuple lets every step pick from either in O(1).
+    pages = list(corpus)
+    links = {page: tuple(corpus[page]) for page in corpus}
+    visits = random_walk(pages, links, damping_factor, n, random)
+    return {page: count / n for page, count in visits.items()}
+
+
+def random_walk(pages, links, damping_factor, n, rng):
+    """
+    Walk `n` pages with the random surfer, starting from a page chosen
+    at random, drawing from `rng` (a random.Random, or the random
+    module). `links` maps each page to a tuple of the pages it links to.
+    Return a dictionary counting the visits to each page.
+    """
+    visits = dict.fromkeys(pages, 0)
+    current = pages[int(rng.random() * len(pages))]
+    visits[current] += 1
+
+    for i in range(n - 1):
+        current_links = links[current]
+        if current_links and rng.random() < damping_factor:
+            current = current_links[int(rng.random() * len(current_links))]
+        else:
+            current = pages[int(rng.random() * len(pages))]
+        visits[current] += 1
+
+    return visits
+
+
+def adaptive_sample_pagerank(corpus, damping_factor, batch_size=1000,
+                             target_error=0.005, top_k=None, patience=3,
+                             max_samples=10 ** 6, confidence=0.95,
+                             workers=1, seed=None, return_report=False):
+    """
+    Return PageRank values for each page by sampling independent walks
+    of `batch_size` pages until the estimates are good enough, instead
+    of a fixed number of samples.
+
+    After each round of batches, every page gets a confidence interval
+    (at level `confidence`) from the spread of its per-batch estimates.
+    Sampling stops when every interval is within +/- `target_error`,
+    when the `top_k` pages (if given) have kept the same order for
+    `patience` rounds, or after `max_samples` samples.
+
+    Each batch draws from its own random.Random seeded from `seed` and
+    the batch number, and with several `workers` a round runs one batch
+    per worker in a process pool. Results are reproducible for a given
+    seed and number of workers.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1. If `return_report` is true, return
+    a (ranks, report) pair, where `report` holds the number of samples
+    and batches used, why sampling stopped, and each page's interval
+    half-width.
+    """
+    pages = list(corpus)
+    links = {page: tuple(corpus[page]) for page in corpus}
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+    totals = dict.fromkeys(pages, 0)
+    sums = dict.fromkeys(pages, 0.0)
+    squares = dict.fromkeys(pages, 0.0)
+    batches = 0
+    stable = 0
+    ranking = None
+    stopped = "max_samples"
+    half_width = dict.fromkeys(pages, math.inf)
+
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(
+            workers, initializer=_set_walk_graph, initargs=(pages, links)
+        )
+    try:
+        while batches * batch_size < max_samples:
+            # Run one batch per worker in each round
+            count = min(max(1, workers),
+                        math.ceil((max_samples - batches * batch_size) / batch_size))
+            tasks = [(damping_factor, batch_size, f"{seed}-{batches + i}")
+                     for i in range(count)]
+            if pool is not None:
+                results = pool.map(_walk_batch, tasks)
+            else:
+                _set_walk_graph(pages, links)
+                results = [_walk_batch(task) for task in tasks]
+
+            for visits in results:
+                batches += 1
+                for page, visited in visits.items():
+                    estimate = visited / batch_size
+                    totals[page] += visited
+                    sums[page] += estimate
+                    squares[page] += estimate * estimate
+            if batches < 2:
+                continue
+
+            for page in pages:
+                mean = sums[page] / batches
+                variance = max(0.0, squares[page] / batches - mean * mean)
+                variance *= batches / (batches - 1)
+                half_width[page] = z * math.sqrt(variance / batches)
+            if max(half_width.values()) <= target_error:
+                stopped = "target_error"
+                break
 
+            if top_k is not None:
+                top = sorted(pages, key=lambda page: -totals[page])[:top_k]
+                stable = stable + 1 if top == ranking else 0
+                ranking = top
+                if stable >= patience:
+                    stopped = "top_k"
+                    break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    samples = batches * batch_size
+    ranks = {page: totals[page] / samples for page in pages}
+    if return_report:
+        report = {
+            "samples": samples,
+            "batches": batches,
+            "stopped": stopped,
+            "half_width": half_width
+        }
+        return ranks, report
+    return ranks
+
+
+# Link structure used by _walk_batch, set once per worker process
+_walk_graph = None
+
+
+def _set_walk_graph(pages, links):
+    global _walk_graph
+    _walk_graph = (pages, links)
+
+
+def _walk_batch(task):
+    """
+    Return the visit counts of one seeded walk, for a
+    (damping_factor, batch_size, seed) task.
+    """
+    damping_factor, batch_size, seed = task
+    pages, links = _walk_graph
+    return random_walk(pages, links, damping_factor, batch_size,
+                       random.Random(seed))
+
+
+def sample_pagerank_vectorized(corpus, damping_factor, n, surfers=1000,
+                               burn_in=50, seed=None):
+    """
+    Return PageRank values for each page by running `surfers`
+    independent random surfers side by side with NumPy, sampling
+    about `n` pages in total. Each surfer first takes `burn_in`
+    uncounted steps, so that short walks do not over-count their
+    uniformly chosen starting pages.
 
-def iterate_pagerank(corpus, damping_factor):
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, _, targets, out_degree = transition_matrix(corpus)
+    rng = np.random.default_rng(seed)
+    N = len(pages)
+    offsets = np.concatenate(([0], np.cumsum(out_degree)[:-1]))
+    surfers = max(1, min(surfers, n))
+    steps = math.ceil(n / surfers)
+
+    current = rng.integers(N, size=surfers)
+    visits = np.zeros(N, dtype=np.int64)
+    for i in range(burn_in + steps):
+        degree = out_degree[current]
+        follow = (rng.random(surfers) < damping_factor) & (degree > 0)
+        teleport = rng.integers(N, size=surfers)
+        if len(targets):
+            choice = offsets[current] + (rng.random(surfers) * degree).astype(np.int64)
+            link = targets[np.minimum(choice, len(targets) - 1)]
+            current = np.where(follow, link, teleport)
+        else:
+            current = teleport
+        if i >= burn_in:
+            visits += np.bincount(current, minlength=N)
+
+    return dict(zip(pages, (visits / visits.sum()).tolist()))
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=0.001, norm="inf",
+                     max_iterations=None, method="jacobi", return_trace=False,
+                     personalization=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    Iteration stops once the change between successive iterations is
+    at most `tolerance`, measured as the largest change of any page
+    (`norm="inf"`) or the total change over all pages (`norm="l1"`),
+    or after `max_iterations` iterations. The "jacobi" method computes
+    each iteration from the previous one, while "gauss-seidel" uses
+    each page's new value as soon as it is known, which usually
+    converges in fewer iterations. `corpus` is not modified.
+    Random jumps follow `personalization` as in transition_model.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
-    PageRank values should sum to 1.
+    PageRank values should sum to 1. If `return_trace` is true, return
+    a (ranks, trace) pair, where `trace` lists the change measured
+    after each iteration.
     """
-    pagerank = {}
-    temp = {}
+    if norm not in ("inf", "l1"):
+        raise ValueError(f"unknown norm: {norm}")
+    if method not in ("jacobi", "gauss-seidel"):
+        raise ValueError(f"unknown method: {method}")
 
     N = len(corpus)
-    page = []
+    pagerank = {key: 1 / N for key in corpus}
+    teleport = teleport_distribution(corpus, personalization)
+
+    # Find the pages linking to each page once, up front
+    pages_linking = {key: [] for key in corpus}
+    for key, links in corpus.items():
+        for link in links:
+            pages_linking[link].append(key)
+    numlinks = {key: len(links) for key, links in corpus.items()}
+
+    # Pages with no links always jump at random, so their rank is shared
+    # by every page, including themselves
+    dangling = [key for key in corpus if not corpus[key]]
+    dangling_rank = sum(pagerank[key] for key in dangling)
+
+    trace = []
+    iterations = 0
+    while max_iterations is None or iterations < max_iterations:
+        iterations += 1
+        if method == "jacobi":
+            temp = {}
+        else:
+            temp = pagerank
+
+        diff = 0
+        for key in corpus:
+            second_condition = dangling_rank * teleport[key]
+            for page in pages_linking[key]:
+                second_condition += pagerank[page] / numlinks[page]
+            formula = ((1 - damping_factor) * teleport[key]) + (damping_factor * second_condition)
+
+            change = abs(formula - pagerank[key])
+            diff = max(diff, change) if norm == "inf" else diff + change
+            if method == "gauss-seidel" and not numlinks[key]:
+                dangling_rank += formula - pagerank[key]
+            temp[key] = formula
 
-    for key in corpus:
-        pagerank[key] = 1 / N
-        temp[key] = 1 / N
-        page.append(key)
+        pagerank = temp
+        if method == "gauss-seidel":
+            # Keep the ranks summing to 1, which Gauss-Seidel sweeps do not
+            total = sum(pagerank.values())
+            for key in pagerank:
+                pagerank[key] /= total
+        dangling_rank = sum(pagerank[key] for key in dangling)
+        trace.append(diff)
+        if diff <= tolerance:
+            break
+
+    if return_trace:
+        return pagerank, trace
+    return pagerank
+
+
+def transition_matrix(corpus):
+    """
+    Build the link structure of `corpus` as NumPy arrays.
+
+    Return (pages, sources, targets, out_degree): `pages` lists the page
+    names, and link `k` goes from page index `sources[k]` to page index
+    `targets[k]`, with links grouped by source page as in CSR form.
+    A LinkGraph's targets are used in place, without copying.
+    """
+    if np is None:
+        raise RuntimeError("the sparse engine requires NumPy")
+
+    if isinstance(corpus, LinkGraph):
+        offsets = np.frombuffer(corpus.offsets, dtype=np.int64)
+        targets = np.frombuffer(corpus.targets, dtype=np.int32)
+        out_degree = np.diff(offsets)
+        sources = np.repeat(np.arange(len(corpus), dtype=np.int64), out_degree)
+        return corpus.pages, sources, targets, out_degree
+
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    out_degree = np.fromiter(
+        (len(corpus[page]) for page in pages), dtype=np.int64, count=len(pages)
+    )
+    targets = np.fromiter(
+        (index[link] for page in pages for link in corpus[page]),
+        dtype=np.int64, count=int(out_degree.sum())
+    )
+    sources = np.repeat(np.arange(len(pages), dtype=np.int64), out_degree)
+    return pages, sources, targets, out_degree
+
+
+def power_iteration(n, sources, targets, out_degree, damping_factor,
+                    tolerance=1e-8, max_iterations=1000):
+    """
+    Return the PageRank vector of the link structure built by
+    transition_matrix, iterating until the L1 change between iterations
+    falls below `tolerance`. Pages without links are treated as
+    linking to every page.
+    """
+    dangling = out_degree == 0
+    # Share of each page's rank passed along each of its links
+    share = np.zeros(n)
+    share[~dangling] = 1 / out_degree[~dangling]
+
+    ranks = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        incoming = np.bincount(
+            targets, weights=(ranks * share)[sources], minlength=n
+        )
+        new_ranks = (
+            (1 - damping_factor) / n
+            + damping_factor * (incoming + ranks[dangling].sum() / n)
+        )
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks
 
-    for key in corpus:
-        if corpus[key] == set():
-            page.remove(key)
-            corpus[key] = page
 
-    diff = math.inf
-    while diff > 0.001:
-        for key in pagerank:
+def power_iteration_batch(n, sources, targets, out_degree, damping_factor,
+                          teleports, tolerance=1e-8, max_iterations=1000):
+    """
+    Return an n x k array whose columns are the personalized PageRank
+    vectors for the k columns of `teleports`, each a distribution that
+    random jumps (and pages without links) follow, over the link
+    structure built by transition_matrix.
+
+    All vectors are iterated together as one sparse-dense matrix
+    product per iteration, using SciPy's CSR matrices when available
+    and a NumPy bincount over blocks of vectors otherwise.
+
+    Each iteration shrinks the L1 error by at least `damping_factor`,
+    and the error starts at no more than 2, so rather than measuring
+    change across the whole batch the iteration count is fixed up front
+    to bring every vector within `tolerance`, up to `max_iterations`.
+    """
+    dangling = out_degree == 0
+    share = np.zeros(n)
+    share[~dangling] = 1 / out_degree[~dangling]
+    weights = share[sources]
+    k = teleports.shape[1]
+
+    if scipy is not None:
+        matrix = scipy.sparse.csr_matrix((weights, (targets, sources)),
+                                         shape=(n, n))
+        def follow_links(ranks):
+            return matrix @ ranks
+    else:
+        # Keep each block's per-link products to about 2^22 numbers
+        block = max(1, min(k, (1 << 22) // max(1, len(targets))))
+        # Position of each link's target in a flattened block of vectors
+        flat_targets = (targets[:, None] * block + np.arange(block)).ravel()
+        def follow_links(ranks):
+            incoming = np.empty((n, k))
+            for i in range(0, k, block):
+                flow = ranks[sources, i:i + block] * weights[:, None]
+                width = flow.shape[1]
+                incoming[:, i:i + width] = np.bincount(
+                    flat_targets.reshape(-1, block)[:, :width].ravel(),
+                    weights=flow.ravel(), minlength=n * block
+                ).reshape(n, block)[:, :width]
+            return incoming
+
+    iterations = max_iterations
+    if 0 < damping_factor < 1 and tolerance < 2:
+        needed = math.ceil(math.log(tolerance / 2) / math.log(damping_factor))
+        iterations = min(iterations, needed)
+    dangling = np.flatnonzero(dangling)
+
+    ranks = teleports.copy()
+    for _ in range(iterations):
+        # Rank arriving by random jump, including from pages without links
+        jumped = (1 - damping_factor) + damping_factor * ranks[dangling].sum(axis=0)
+        new_ranks = follow_links(ranks)
+        new_ranks *= damping_factor
+        new_ranks += teleports * jumped
+        ranks = new_ranks
+    return ranks
+
+
+def personalized_pagerank_batch(corpus, damping_factor, personalizations,
+                                tolerance=1e-8, max_iterations=1000):
+    """
+    Return a list with the personalized PageRank values for each
+    personalization dict in `personalizations`, computed together over
+    one shared sparse transition matrix.
 
-            pages_linking = []
+    Each result is a dictionary where keys are page names, and values
+    are their PageRank value; each sums to 1.
+    """
+    pages, sources, targets, out_degree = transition_matrix(corpus)
+    teleports = np.zeros((len(pages), len(personalizations)))
+    for j, personalization in enumerate(personalizations):
+        teleport = teleport_distribution(corpus, personalization)
+        teleports[:, j] = [teleport[page] for page in pages]
 
-            for item in corpus.items():
-                if key in item[1]:
-                    pages_linking.append(item[0])
-            
-            second_condition = 0
+    ranks = power_iteration_batch(len(pages), sources, targets, out_degree,
+                                  damping_factor, teleports, tolerance,
+                                  max_iterations)
+    return [dict(zip(pages, column)) for column in ranks.T.tolist()]
 
-            for page in pages_linking:
-                PR_i = pagerank[page]
-                Numlinks_i = len(corpus[page])
 
-                second_condition += PR_i / Numlinks_i
-            formula = ((1 - damping_factor) / N) + (damping_factor * second_condition)
+def iterate_pagerank_sparse(corpus, damping_factor, tolerance=1e-8,
+                            max_iterations=1000):
+    """
+    Return PageRank values for each page by power iteration over a
+    sparse transition matrix, built once from `corpus`.
 
-            temp[key] = formula
-        
-        for key in temp:
-            diff = abs(temp[key] - pagerank[key])
-            if diff > 0.001:
-                break
-        
-        pagerank = temp.copy()
-    
-    return pagerank
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    pages, sources, targets, out_degree = transition_matrix(corpus)
+    ranks = power_iteration(len(pages), sources, targets, out_degree,
+                            damping_factor, tolerance, max_iterations)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def load_state(path):
+    """
+    Return the (corpus, scores, damping_factor) saved at `path`,
+    or None if nothing has been saved there.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    corpus = {page: set(links) for page, links in state["corpus"].items()}
+    return corpus, state["scores"], state["damping"]
+
+
+def save_state(path, corpus, scores, damping_factor):
+    """
+    Save a corpus and its unnormalized PageRank scores to `path`.
+    """
+    state = {
+        "damping": damping_factor,
+        "corpus": {page: sorted(links) for page, links in corpus.items()},
+        "scores": scores
+    }
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def incremental_pagerank(corpus, damping_factor, path, tolerance=1e-6):
+    """
+    Return PageRank values for each page, warm-starting from the scores
+    saved at `path` for an earlier version of the corpus, and save the
+    new corpus and scores there afterwards.
+
+    Rather than the ranks themselves, this solves for scores z with
+    z = 1 + damping_factor * (sum of z / links over linking pages),
+    letting rank leak out of pages without links. Normalizing z gives
+    exactly the PageRank values, but unlike them z does not depend on
+    the number of pages or on pages without links, so a change to the
+    corpus only disturbs z near the pages and links that changed.
+
+    Starting from the saved scores, each page's residual (how far its
+    score is from what its links give it) is found in one pass, and is
+    then pushed into its score and along its links until the residuals
+    are small enough to keep the total (L1) error of the ranks within
+    about `tolerance`. The number of pushes is kept in `num_updates`.
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    global num_updates
+    num_updates = 0
+
+    # Residuals r leave the scores at most sum(|r|) / (1 - damping) off,
+    # out of scores that sum to at least the number of pages
+    threshold = tolerance * (1 - damping_factor)
+
+    saved = load_state(path)
+    scores = {page: 0.0 for page in corpus}
+    if saved is not None and saved[2] == damping_factor:
+        for page, score in saved[1].items():
+            if page in scores:
+                scores[page] = score
+
+    # Residual of every page with respect to the new corpus
+    residual = dict.fromkeys(corpus, 1.0)
+    for page, links in corpus.items():
+        residual[page] -= scores[page]
+        if links:
+            share = damping_factor * scores[page] / len(links)
+            for link in links:
+                residual[link] += share
+
+    queue = deque(page for page in corpus if abs(residual[page]) > threshold)
+    queued = set(queue)
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        push = residual[page]
+        residual[page] = 0.0
+        scores[page] += push
+        num_updates += 1
+
+        links = corpus[page]
+        if links:
+            share = damping_factor * push / len(links)
+            for link in links:
+                residual[link] += share
+                if abs(residual[link]) > threshold and link not in queued:
+                    queued.add(link)
+                    queue.append(link)
+
+    save_state(path, corpus, scores, damping_factor)
+    total = sum(scores.values())
+    return {page: score / total for page, score in scores.items()}
 
 
 if __name__ == "__main__":